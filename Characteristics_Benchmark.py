@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, CharacteristicsSolver
+from src.Core import TireState
+
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    # Random load cases of load, camber and speed
+    cases = 100000
+    random = np.random.RandomState(0)
+    FZ = random.uniform(1000.0, 9000.0, cases)
+    IA = random.uniform(-0.08, 0.08, cases)
+    V = random.uniform(5.0, 40.0, cases)
+
+    print('OpenTire Characteristics Benchmark, {0} load cases\n'.format(cases))
+
+    solver = CharacteristicsSolver(model)
+    start_time = time.perf_counter()
+    result = solver.solve(FZ, IA, V)
+    solver_time = time.perf_counter() - start_time
+
+    # Reference: dense slip angle sweep of the pure lateral force for a subset of the load cases
+    subset = 200
+    SA = np.linspace(0.0, 0.6, 10001)
+    start_time = time.perf_counter()
+    peak_fy = np.empty(subset)
+    peak_sa = np.empty(subset)
+    for index in range(subset):
+        FY = model.calculate_pure_fy(TireState(FZ=FZ[index], IA=IA[index], V=V[index], SA=SA))
+        peak = np.argmax(np.abs(FY))
+        peak_fy[index], peak_sa[index] = FY[peak], SA[peak]
+    sweep_time = (time.perf_counter() - start_time) * cases / subset
+
+    print('Dense sweep (estimated):  {0:8.2f} s, {1:10.0f} load cases/s'.format(sweep_time, cases / sweep_time))
+    print('Characteristics solver:   {0:8.2f} s, {1:10.0f} load cases/s'.format(solver_time, cases / solver_time))
+    print('Speedup:                  {0:8.0f}x\n'.format(sweep_time / solver_time))
+
+    print('Largest peak FY difference to the sweep:  {0:.2e} N'.format(
+        np.max(np.abs(result.FY_PEAK[:subset] - peak_fy))))
+    print('Largest peak SA difference to the sweep:  {0:.2e} rad (sweep step {1:.0e} rad)'.format(
+        np.max(np.abs(result.SA_PEAK[:subset] - peak_sa)), SA[1] - SA[0]))
+    print('Cornering stiffness:  {0:.0f} to {1:.0f} N/rad'.format(np.min(result.CORNERING_STIFFNESS),
+                                                                  np.max(result.CORNERING_STIFFNESS)))
+    print('Pneumatic trail:      {0:.4f} to {1:.4f} m'.format(np.min(result.PNEUMATIC_TRAIL),
+                                                              np.max(result.PNEUMATIC_TRAIL)))
+
+    # E_y clipped to 1 with 1 < C_y < 1.57: no peak, the force keeps growing towards its limit for large slip
+    model.set_parameters(dict(PCY1=1.3, PEY1=5.0, PEY2=0.0, PEY3=0.0, PEY4=0.0))
+    result = CharacteristicsSolver(model).solve(4000.0, 0.0, 10.0)
+    FY = model.calculate_pure_fy(TireState(FZ=4000.0, IA=0.0, V=10.0, SA=np.linspace(-1.57, 1.57, 20001)))
+    print('\nClipped E_y, limit FY: {0:.1f} / {1:.1f} N, dense sweep to 1.57 rad: {2:.1f} / {3:.1f} N'.format(
+        float(result.FY_PEAK), float(result.FY_PEAK_NEGATIVE), np.min(FY), np.max(FY)))
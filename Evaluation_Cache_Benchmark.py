@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode, PAC2002, EvaluationCache
+from src.Core import TireState, TireStateBatch
+
+import time
+import numpy as np
+
+
+def steady_state_cornering(steps, wheels=4):
+    # Operating points of a car in steady state cornering: the same four wheel states every step, with measurement
+    # noise far below the cache resolution
+    base = TireStateBatch(wheels)
+    base.FZ = [3000.0, 3400.0, 4600.0, 5000.0][:wheels]
+    base.SA = [0.04, 0.045, 0.05, 0.055][:wheels]
+    base.SR = 0.01
+    base.IA = [-0.02, 0.02, -0.03, 0.03][:wheels]
+    base.V = 20.0
+
+    for step in range(steps):
+        state = TireStateBatch(data=base.data.copy())
+        state.SA += np.random.uniform(-1e-8, 1e-8, wheels)
+        yield state
+
+
+def time_steps(model, states, mode):
+    start_time = time.perf_counter()
+    for state in states:
+        model.solve_batch(state, mode)
+    return (time.perf_counter() - start_time) / len(states)
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+    mode = SolverMode.Fy | SolverMode.Fx | SolverMode.Mz
+    states = list(steady_state_cornering(5000))
+
+    cache = EvaluationCache(model, size=1024)
+
+    print('OpenTire Evaluation Cache Benchmark, steady state cornering, 4 wheels per step\n')
+    print('Uncached: {0:8.1f} us per step'.format(time_steps(model, states, mode) * 1e6))
+    print('Cached:   {0:8.1f} us per step'.format(time_steps(cache, states, mode) * 1e6))
+    print('Hits: {0}, misses: {1}, hit rate: {2:.4f}\n'.format(cache.hits, cache.misses, cache.hit_rate))
+
+    # A single point state, e.g. from a quasi static load case
+    point = TireState(FZ=4000.0, SA=0.05, SR=0.0, IA=0.0, V=20.0)
+    points = [point] * 5000
+    print('Single point uncached: {0:8.1f} us'.format(time_steps(model, points, mode) * 1e6))
+    print('Single point cached:   {0:8.1f} us\n'.format(time_steps(cache, points, mode) * 1e6))
+
+    # Changing a coefficient empties the cache, the next step is computed again
+    model.PDY1 *= 1.05
+    cache.solve_batch(states[0], mode)
+    print('After a coefficient change: invalidations: {0}, misses: {1}, cached points: {2}'.format(
+        cache.invalidations, cache.misses, len(cache)))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode
+from src.TireModel.PAC2002 import PAC2002
+from src.Core import TireState, TireStateBatch
+
+import time
+import numpy as np
+
+
+def solve_unshared(model, state):
+    # Same outputs as solve_batch in SolverMode.All, but every output builds its own context (no sharing)
+    state.FY = model.calculate_fy(state)
+    state.FX = model.calculate_fx(state)
+    state.MZ = model.calculate_mz(state)
+    state.MX = model.calculate_mx(state)
+    state.MY = model.calculate_my(state)
+    state.RL, state.RE = model.calculate_radius(state)
+    state.SIGMA_ALPHA = model.calculate_lateral_relaxation_length(state)
+    state.SIGMA_KAPPA = model.calculate_longitudinal_relaxation_length(state)
+    return state
+
+
+def count_equation_calls(model, solve, state):
+    # Count the calls to the private equation helpers (__calculate_*) made by one full solve
+    counts = dict()
+    originals = dict()
+
+    for name in dir(PAC2002):
+        if name.startswith('_PAC2002__calculate_'):
+            originals[name] = getattr(PAC2002, name)
+
+    def counting(name, method):
+        def wrapper(*args, **kwargs):
+            counts[name] = counts.get(name, 0) + 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    try:
+        for name, method in originals.items():
+            setattr(PAC2002, name, counting(name, method))
+        solve(model, state)
+    finally:
+        for name, method in originals.items():
+            setattr(PAC2002, name, method)
+
+    return sum(counts.values())
+
+
+def time_solve(model, solve, state, repeats):
+    start_time = time.perf_counter()
+    for i in range(repeats):
+        solve(model, state)
+    return (time.perf_counter() - start_time) / repeats
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+    shared = lambda m, s: m.solve_batch(s, SolverMode.All)
+
+    # A single operating point
+    point = TireState(FZ=4000.0, IA=0.02, SA=0.05, SR=0.03, V=10.0, P=200000)
+
+    # A batch of 100k operating points
+    batch = TireStateBatch(100000)
+    batch.FZ = np.random.uniform(1000, 8000, len(batch))
+    batch.IA = np.random.uniform(-0.1, 0.1, len(batch))
+    batch.SA = np.random.uniform(-0.25, 0.25, len(batch))
+    batch.SR = np.random.uniform(-0.2, 0.2, len(batch))
+    batch.V = 10.0
+
+    print('OpenTire EvaluationContext Benchmark, SolverMode.All\n')
+    print('{0:>12} | {1:>16} | {2:>16} | {3:>16}'.format('', 'Equation calls', 'Point [us]', '100k batch [ms]'))
+    print('=' * 70)
+
+    for label, solve in [('Unshared', solve_unshared), ('Shared', shared)]:
+        calls = count_equation_calls(model, solve, point)
+        point_time = time_solve(model, solve, point, 2000)
+        batch_time = time_solve(model, solve, batch, 10)
+
+        print('{0:>12} | {1:>16d} | {2:>16.1f} | {3:>16.1f}'.format(label, calls, point_time * 1e6, batch_time * 1e3))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode, PAC2002, Pacejka94
+from src.Core import TireStateBatch
+from src.Fitting import ModelFitter
+
+import numpy as np
+
+
+def measurement_points(slip_angles, slip_ratios, loads=(2000.0, 4000.0, 6000.0, 8000.0), cambers=(-0.05, 0.0, 0.05)):
+    # Full grid of the given loads, cambers, slip angles and slip ratios
+    FZ, IA, SA, SR = [axis.ravel() for axis in np.meshgrid(loads, cambers, slip_angles, slip_ratios, indexing='ij')]
+    data = TireStateBatch(len(FZ))
+    data.FZ, data.IA, data.SA, data.SR = FZ, IA, SA, SR
+    data.V = 16.0
+    return data
+
+
+def synthetic_measurement(model, noise=0.01):
+    # Pure lateral, pure longitudinal and combined slip sweeps of model, with relative noise added to the outputs
+    sweeps = [measurement_points(np.linspace(-0.25, 0.25, 51), [0.0]),
+              measurement_points([0.0], np.linspace(-0.25, 0.25, 51)),
+              measurement_points([-0.1, -0.05, 0.05, 0.1], np.linspace(-0.25, 0.25, 51))]
+    data = TireStateBatch(data=np.concatenate([sweep.data for sweep in sweeps], axis=1))
+    model.solve_batch(data, SolverMode.All)
+
+    for name in ('FX', 'FY', 'MZ'):
+        column = getattr(data, name)
+        setattr(data, name, column + noise * np.std(column) * np.random.randn(len(column)))
+
+    return data
+
+
+def perturb(model, factor=0.15):
+    # Move every coefficient of the model by a random relative amount
+    parameters = model.get_parameters()
+    vector = np.array([parameters[name] for name in sorted(parameters)], dtype=float)
+    vector *= 1.0 + factor * np.random.uniform(-1.0, 1.0, len(vector))
+    model.set_parameters(dict(zip(sorted(parameters), vector.tolist())))
+
+
+if __name__ == "__main__":
+
+    np.random.seed(1)
+
+    for measured_model, fitted_model in [(PAC2002(), PAC2002()), (Pacejka94(), Pacejka94())]:
+
+        # The measurement comes from a model with perturbed coefficients, the fit starts from the defaults
+        perturb(measured_model)
+        data = synthetic_measurement(measured_model)
+
+        print('Fitting {0} to {1} measured points\n'.format(fitted_model.Name, len(data)))
+        for result in ModelFitter(fitted_model).fit(data):
+            print(result)
+        print('')
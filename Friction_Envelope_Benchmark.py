@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode, FrictionEnvelope
+from src.Core import TireState, TireStateBatch
+
+import time
+import numpy as np
+
+
+def envelope_radius(FX, FY, angle):
+    # Radius of the envelope polygon FX, FY in the force directions angle
+    theta = np.arctan2(FY, FX)
+    order = np.argsort(theta)
+    return np.interp(angle, theta[order], np.hypot(FX, FY)[order], period=2.0 * np.pi)
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    # Load cases: every combination of load, camber and speed
+    FZ, IA, V = np.meshgrid([2000.0, 3500.0, 5000.0, 6500.0, 8000.0], [0.0, 0.05], [10.0, 30.0], indexing='ij')
+    cases = FZ.size
+
+    print('OpenTire Friction Envelope Benchmark, {0} load cases\n'.format(cases))
+
+    generator = FrictionEnvelope(model)
+    start_time = time.perf_counter()
+    envelope = generator.solve(FZ, IA, V)
+    adaptive_time = time.perf_counter() - start_time
+
+    # Reference: dense 100 x 100 grid of slip angle and slip ratio for every load case
+    SA, SR = np.meshgrid(np.arctan(np.linspace(-0.5, 0.5, 100)), np.linspace(-0.5, 0.5, 100), indexing='ij')
+    start_time = time.perf_counter()
+    dense = []
+    for index in range(cases):
+        state = TireState(FZ=FZ.flat[index], IA=IA.flat[index], V=V.flat[index], SA=SA, SR=SR)
+        batch = TireStateBatch.from_state(state)[0]
+        model.solve_batch(batch, SolverMode.Fx | SolverMode.Fy)
+        dense.append((batch.FX.copy(), batch.FY.copy()))
+    dense_time = time.perf_counter() - start_time
+
+    # Dense grid points outside the envelope, and the largest force of both
+    outside = []
+    peak = []
+    for index, (FX, FY) in enumerate(dense):
+        radius = envelope_radius(envelope.FX[index], envelope.FY[index], np.arctan2(FY, FX))
+        outside.append(np.max(np.hypot(FX, FY) / radius) - 1.0)
+        peak.append(np.max(np.hypot(envelope.FX[index], envelope.FY[index])) / np.max(np.hypot(FX, FY)) - 1.0)
+
+    print('Dense grid:  {0:8.1f} ms, {1:6d} points per load case'.format(dense_time * 1000.0, SA.size))
+    print('Adaptive:    {0:8.1f} ms, {1:6d} points per load case, {2} directions'.format(
+        adaptive_time * 1000.0, generator.evaluations // cases, envelope.FX.shape[1]))
+    print('Speedup:     {0:8.1f}x\n'.format(dense_time / adaptive_time))
+    print('Largest grid force outside the envelope:  {0:+.3%}'.format(max(outside)))
+    print('Largest envelope force over the grid:     {0:+.3%} to {1:+.3%}'.format(min(peak), max(peak)))
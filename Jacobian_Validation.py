@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode
+from src.TireModel.PAC2002 import PAC2002, COEFFICIENT_NAMES
+from src.Core import TireStateBatch
+
+import time
+import numpy as np
+
+OUTPUTS = ('FX', 'FY', 'MZ', 'MX', 'MY')
+VARIABLES = ('SA', 'SR', 'FZ', 'IA')
+MODE = SolverMode.Fx | SolverMode.Fy | SolverMode.Mz | SolverMode.Mx | SolverMode.My
+
+# Central difference step per variable
+STEPS = {'SA': 1e-6, 'SR': 1e-6, 'FZ': 1e-2, 'IA': 1e-6}
+
+# Offsets of the lateral force and the trail, without them alpha_t and alpha_r are zero at zero slip
+OFFSETS = ('PHY1', 'PHY2', 'PHY3', 'PVY1', 'PVY2', 'PVY3', 'PVY4', 'QHZ1', 'QHZ2', 'QHZ3', 'QHZ4')
+
+
+def finite_difference_jacobian(model, batch):
+    jacobian = dict()
+
+    for name in VARIABLES:
+        upper = TireStateBatch(data=batch.data.copy())
+        lower = TireStateBatch(data=batch.data.copy())
+        setattr(upper, name, getattr(batch, name) + STEPS[name])
+        setattr(lower, name, getattr(batch, name) - STEPS[name])
+
+        model.solve_batch(upper, MODE)
+        model.solve_batch(lower, MODE)
+        jacobian[name] = TireStateBatch(data=(upper.data - lower.data) / (2.0 * STEPS[name]))
+
+    return jacobian
+
+
+def finite_difference_parameter_jacobian(model, batch):
+    vector = model.get_parameter_vector()
+    jacobian = dict((output, np.empty((len(batch), len(vector)))) for output in OUTPUTS)
+
+    try:
+        for column, value in enumerate(vector):
+            step = 1e-6 * max(1.0, abs(value))
+            results = []
+            for sign in (1.0, -1.0):
+                perturbed = vector.copy()
+                perturbed[column] += sign * step
+                model.set_parameter_vector(perturbed)
+                results.append(model.solve_batch(TireStateBatch(data=batch.data.copy()), MODE))
+
+            for output in OUTPUTS:
+                jacobian[output][:, column] = (getattr(results[0], output) - getattr(results[1], output)) / (2.0 * step)
+    finally:
+        model.set_parameter_vector(vector)
+
+    return jacobian
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    # Random operating points, kept away from zero slip where the sign dependent curvature factors are discontinuous
+    points = 100000
+    batch = TireStateBatch(points)
+    batch.FZ = np.random.uniform(1000, 8000, points)
+    batch.IA = np.random.uniform(-0.1, 0.1, points)
+    batch.SA = np.random.uniform(0.01, 0.25, points) * np.random.choice([-1, 1], points)
+    batch.SR = np.random.uniform(0.01, 0.2, points) * np.random.choice([-1, 1], points)
+    batch.V = 10.0
+
+    start_time = time.perf_counter()
+    analytic = model.calculate_jacobian(batch, MODE, VARIABLES)
+    analytic_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    numeric = finite_difference_jacobian(model, batch)
+    numeric_time = time.perf_counter() - start_time
+
+    print('OpenTire PAC2002 Jacobian vs central differences, {0} points\n'.format(points))
+    print('Jacobian: {0:.1f} ms, central differences: {1:.1f} ms\n'.format(analytic_time * 1e3, numeric_time * 1e3))
+    print('Median relative difference')
+    print('{0:>6} |'.format('') + ''.join('{0:>12}'.format('d/d' + name) for name in VARIABLES))
+    print('=' * (8 + 12 * len(VARIABLES)))
+
+    for output in OUTPUTS:
+        row = '{0:>6} |'.format(output)
+        for name in VARIABLES:
+            exact = getattr(analytic[name], output)
+            approximate = getattr(numeric[name], output)
+            scale = np.abs(exact) + np.abs(approximate) + 1e-12
+            row += '{0:>12.1e}'.format(np.median(np.abs(exact - approximate) / scale))
+        print(row)
+
+    stiffness = model.create_context(batch)
+    print('\nCornering stiffness K_y: {0:.0f} .. {1:.0f} N/rad'.format(np.min(stiffness.K_y), np.max(stiffness.K_y)))
+    print('Slip stiffness K_x: {0:.0f} .. {1:.0f} N'.format(np.min(stiffness.K_x), np.max(stiffness.K_x)))
+
+    # Coefficient Jacobian, on a smaller batch since central differences need two solves per coefficient
+    batch = batch[:10000]
+
+    start_time = time.perf_counter()
+    outputs, analytic = model.calculate_parameter_jacobian(batch, MODE)
+    analytic_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    numeric = finite_difference_parameter_jacobian(model, batch)
+    numeric_time = time.perf_counter() - start_time
+
+    print('\nCoefficient Jacobian ({0} coefficients) vs central differences, {1} points\n'.format(
+        len(COEFFICIENT_NAMES), len(batch)))
+    print('Jacobian: {0:.1f} ms, central differences: {1:.1f} ms\n'.format(analytic_time * 1e3, numeric_time * 1e3))
+    print('Largest difference relative to the largest derivative of each coefficient')
+
+    for output in OUTPUTS:
+        scale = np.max(np.abs(analytic[output]), axis=0) + np.max(np.abs(numeric[output]), axis=0) + 1e-12
+        error = np.max(np.abs(analytic[output] - numeric[output]), axis=0) / scale
+        print('{0:>6} | {1:.1e} ({2})'.format(output, np.max(error), COEFFICIENT_NAMES[np.argmax(error)]))
+
+    # Zero slip, on a tire without offsets. The equivalent slip angles of the aligning moment (eq. 84, 85) are the
+    # root of a sum of squares that is zero there, the derivatives must still be finite and match.
+    model.set_parameters(dict((name, 0.0) for name in OFFSETS))
+    batch = TireStateBatch(1000)
+    batch.FZ = np.linspace(1000, 8000, len(batch))
+    batch.IA = 0.0
+    batch.SA = 0.0
+    batch.SR = 0.0
+    batch.V = 10.0
+
+    analytic = model.calculate_jacobian(batch, MODE, VARIABLES)
+    numeric = finite_difference_jacobian(model, batch)
+    outputs, parameter_jacobian = model.calculate_parameter_jacobian(batch, MODE)
+
+    print('\nZero slip, {0} points without offsets\n'.format(len(batch)))
+    print('Largest relative difference, and if the coefficient Jacobian is finite')
+    print('{0:>6} |'.format('') + ''.join('{0:>12}'.format('d/d' + name) for name in VARIABLES) + '{0:>12}'.format('finite'))
+    print('=' * (8 + 12 * (len(VARIABLES) + 1)))
+
+    for output in OUTPUTS:
+        row = '{0:>6} |'.format(output)
+        for name in VARIABLES:
+            exact = getattr(analytic[name], output)
+            approximate = getattr(numeric[name], output)
+            scale = np.abs(exact) + np.abs(approximate) + 1e-12
+            row += '{0:>12.1e}'.format(np.max(np.abs(exact - approximate) / scale))
+        print(row + '{0:>12}'.format(str(bool(np.all(np.isfinite(parameter_jacobian[output]))))))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode, PAC2002, LookupTableModel
+from src.Core import TireState, TireStateBatch
+
+import os
+import tempfile
+import time
+import numpy as np
+
+
+def time_call(function, repeats):
+    start_time = time.perf_counter()
+    for i in range(repeats):
+        function()
+    return (time.perf_counter() - start_time) / repeats
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+    mode = SolverMode.Fy | SolverMode.Fx | SolverMode.Mz | SolverMode.Mx | SolverMode.My
+
+    start_time = time.perf_counter()
+    table = LookupTableModel.from_model(model, SA=(-0.3, 0.3, 121), SR=(-0.3, 0.3, 121), FZ=(500.0, 9000.0, 18),
+                                        IA=(-0.1, 0.1, 9), V=16.6, mode=mode)
+    bake_time = time.perf_counter() - start_time
+
+    print('OpenTire Lookup Table Benchmark, PAC2002 on {0} grid points, baked in {1:.2f} s\n'.format(
+        table.table[..., 0].size, bake_time))
+
+    # The table is saved and memory mapped back, as a HIL process would use it
+    fname = os.path.join(tempfile.mkdtemp(), 'pac2002')
+    table.save(fname)
+    start_time = time.perf_counter()
+    table = LookupTableModel.load(fname)
+    print('Load time: {0:.2f} ms\n'.format((time.perf_counter() - start_time) * 1e3))
+
+    # Four wheels, as evaluated per time step, and a large batch
+    wheels = TireStateBatch(4)
+    wheels.FZ = [3500.0, 3700.0, 4200.0, 4400.0]
+    wheels.SA = [0.04, 0.05, 0.03, 0.035]
+    wheels.SR = [0.01, 0.01, 0.05, 0.06]
+    wheels.IA = [-0.02, 0.02, -0.01, 0.01]
+    wheels.V = 16.6
+
+    batch = TireStateBatch(100000)
+    batch.FZ = np.random.uniform(500, 9000, len(batch))
+    batch.SA = np.random.uniform(-0.3, 0.3, len(batch))
+    batch.SR = np.random.uniform(-0.3, 0.3, len(batch))
+    batch.IA = np.random.uniform(-0.1, 0.1, len(batch))
+    batch.V = 16.6
+
+    print('{0:>10} | {1:>14} | {2:>16}'.format('', '4 wheels [us]', '100k batch [ms]'))
+    print('=' * 48)
+    print('{0:>10} | {1:>14.1f} | {2:>16.1f}'.format(
+        'Analytic', time_call(lambda: model.solve_batch(wheels, mode), 1000) * 1e6,
+        time_call(lambda: model.solve_batch(batch, mode), 5) * 1e3))
+
+    for interpolation in ('linear', 'cubic'):
+        table.set_parameters({'interpolation': interpolation})
+        print('{0:>10} | {1:>14.1f} | {2:>16.1f}'.format(
+            interpolation.capitalize(), time_call(lambda: table.solve_batch(wheels, mode), 1000) * 1e6,
+            time_call(lambda: table.solve_batch(batch, mode), 5) * 1e3))
+
+    for interpolation in ('linear', 'cubic'):
+        table.set_parameters({'interpolation': interpolation})
+        print('\n{0} interpolation error against the analytic model, 100k random points'.format(
+            interpolation.capitalize()))
+        print('{0:>6} | {1:>12} | {2:>12} | {3:>12}'.format('', 'Max', 'RMS', 'RMS output'))
+        for name, (largest, rms, scale) in sorted(table.error_report(model, mode=mode).items()):
+            print('{0:>6} | {1:>12.3g} | {2:>12.3g} | {3:>12.3g}'.format(name, largest, rms, scale))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002
+from src.Core import TireStateBatch
+from src.Parsers import TIRFile, TIRCache, ModelBank
+from TIR_Parser_Benchmark import synthetic_tir
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    count = 300
+    directory = tempfile.mkdtemp()
+
+    try:
+        # Synthetic tire library, every file with its own random coefficient variation
+        model = PAC2002()
+        vector = model.get_parameter_vector()
+        names = list(model.get_parameters())
+        random = np.random.RandomState(0)
+        library = os.path.join(directory, 'library')
+        os.makedirs(library)
+        for i in range(count):
+            values = vector * (1.0 + 0.05 * random.uniform(-1.0, 1.0, len(vector)))
+            with open(os.path.join(library, 'tire_{0:03d}.tir'.format(i)), 'w') as f:
+                f.write(synthetic_tir(dict(zip(names, values.tolist()))))
+
+        print('OpenTire Model Bank Benchmark, {0} synthetic PAC2002 files, {1} processes\n'.format(count,
+                                                                                                 os.cpu_count()))
+
+        start_time = time.perf_counter()
+        models = [TIRFile().load(os.path.join(library, fname)) for fname in sorted(os.listdir(library))]
+        single_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        bank = ModelBank.from_directory(library)
+        bank_time = time.perf_counter() - start_time
+
+        cache = TIRCache(os.path.join(directory, 'cache'))
+        ModelBank.from_directory(library, cache=cache)
+        start_time = time.perf_counter()
+        cached_bank = ModelBank.from_directory(library, cache=TIRCache(os.path.join(directory, 'cache')))
+        cached_time = time.perf_counter() - start_time
+
+        print('TIRFile.load one by one:  {0:8.3f} s'.format(single_time))
+        print('ModelBank.from_directory: {0:8.3f} s'.format(bank_time))
+        print('Same, from a TIRCache:    {0:8.3f} s'.format(cached_time))
+        print('Coefficient array: {0} x {1}, identical to the cached one: {2}\n'.format(
+            bank.coefficients.shape[0], bank.coefficients.shape[1],
+            np.array_equal(bank.coefficients, cached_bank.coefficients)))
+
+        # Steady state cornering at three loads, the same maneuver for every tire
+        points = 201
+        state = TireStateBatch(3 * points)
+        state.SA = np.tile(np.linspace(-0.2, 0.2, points), 3)
+        state.FZ = np.repeat([2000.0, 4000.0, 6000.0], points)
+        state.V = 16.6
+
+        start_time = time.perf_counter()
+        result = bank.solve_batch(state)
+        bank_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        forces = np.array([m.solve_batch(TireStateBatch(data=state.data.copy())).FY for m in models])
+        loop_time = time.perf_counter() - start_time
+
+        print('{0} tires x {1} points'.format(count, len(state)))
+        print('One model at a time:  {0:8.1f} ms'.format(loop_time * 1e3))
+        print('ModelBank.solve_batch:{0:8.1f} ms'.format(bank_time * 1e3))
+        print('Largest FY difference: {0:g} N\n'.format(np.max(np.abs(result.FY - forces))))
+
+        peak = np.max(np.abs(result.FY[:, points:2 * points]), axis=1)
+        print('Peak FY at 4000 N: {0:.0f} N ({1}) to {2:.0f} N ({3})'.format(
+            peak.min(), bank.names[np.argmin(peak)], peak.max(), bank.names[np.argmax(peak)]))
+    finally:
+        shutil.rmtree(directory)
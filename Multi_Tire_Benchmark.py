@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode
+from src.Core import TireState, SweepGrid
+
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    # Tire selection study: 300 coefficient sets on the same 100k point grid of combined slip
+    tires = 300
+    model = PAC2002()
+    vector = model.get_parameter_vector()
+    random = np.random.RandomState(0)
+    coefficients = vector * (1.0 + 0.05 * random.uniform(-1.0, 1.0, (tires, len(vector))))
+
+    state = TireState()
+    state.FZ = np.linspace(1000.0, 8000.0, 10)
+    state.IA = [0.0]
+    state.SR = np.linspace(-0.2, 0.2, 100)
+    state.SA = np.linspace(-0.2, 0.2, 100)
+    state.V = [16.6]
+    state.P = [0.0]
+    mode = SolverMode.Fx | SolverMode.Fy
+
+    grid = SweepGrid.from_state(state, model.GRID_AXES)
+    print('OpenTire Multi Tire Benchmark, {0} tires x {1} points, combined FX and FY\n'.format(tires, len(grid)))
+
+    start_time = time.perf_counter()
+    result = model.solve_tires(coefficients, state, mode)
+    tires_time = time.perf_counter() - start_time
+
+    # One model and one solve per tire, the same grid chunking as PAC2002.solve
+    start_time = time.perf_counter()
+    single = np.empty((tires, len(grid)))
+    for tire in range(tires):
+        model.set_parameter_vector(coefficients[tire])
+        for start, stop in grid.chunk_bounds():
+            single[tire, start:stop] = model.solve_batch(grid.expand(start, stop), mode).FY
+    single_time = time.perf_counter() - start_time
+
+    # The per point math is the same either way, only the terms that depend on the state alone are shared, so the
+    # gain is modest (1.1 to 1.2x)
+    print('One solve per tire:  {0:7.2f} s'.format(single_time))
+    print('PAC2002.solve_tires: {0:7.2f} s  ({1:.1f} M tire points/s, {2:.2f}x)'.format(
+        tires_time, tires * len(grid) / tires_time / 1e6, single_time / tires_time))
+    print('Largest FY difference: {0:g} N\n'.format(np.max(np.abs(result.FY - single))))
+
+    # Small grid of 10 loads x 100 slip angles, where the cost per call matters more than the cost per point
+    state.SR = [0.0]
+    small = SweepGrid.from_state(state, model.GRID_AXES).expand()
+
+    start_time = time.perf_counter()
+    model.solve_tires_batch(coefficients, small, mode)
+    tires_small_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    for tire in range(tires):
+        model.set_parameter_vector(coefficients[tire])
+        model.solve_batch(small[0:len(small)], mode)
+    single_small_time = time.perf_counter() - start_time
+
+    print('{0} tires x {1} points'.format(tires, len(small)))
+    print('One solve_batch per tire:   {0:7.1f} ms'.format(single_small_time * 1e3))
+    print('PAC2002.solve_tires_batch:  {0:7.1f} ms ({1:.2f}x)\n'.format(tires_small_time * 1e3,
+                                                                      single_small_time / tires_small_time))
+
+    # Tire with the largest lateral force at 4000 N, 5 deg and no longitudinal slip
+    point = np.argmin(np.abs(result.FZ - 4000.0) + np.abs(result.SA - 0.0873) + np.abs(result.SR))
+    best = np.argmax(np.abs(result.FY[:, point]))
+    print('Largest FY at FZ {0:.0f} N, SA {1:.3f}, SR {2:.3f}: tire {3}, {4:.0f} N'.format(
+        result.FZ[point], result.SA[point], result.SR[point], best, result.FY[best, point]))
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+from src.TireModel import SolverMode, ParallelSweep
+from src.TireModel.PAC2002 import PAC2002
+from src.TireModel import Pacejka94
+from src.Core import TireState
+
+import os
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    # A load/camber/pressure matrix with slip sweeps, 1.25M operating points
+    state = TireState()
+    state.FZ = np.linspace(1000, 8000, 25)
+    state.IA = np.linspace(-0.1, 0.1, 5)
+    state.V = [10.0]
+    state.P = np.linspace(180000, 260000, 5)
+    state.SR = np.linspace(-0.2, 0.2, 20)
+    state.SA = np.linspace(-15, 15, 100) * np.pi / 180
+
+    max_workers = os.cpu_count()
+    worker_counts = sorted(set([1, 2, 4, 8, 16, 32, 64, max_workers]))
+    worker_counts = [n for n in worker_counts if n <= max_workers]
+
+    print('OpenTire Parallel Sweep Benchmark ({0} cores available)\n'.format(max_workers))
+
+    for model in [PAC2002(), Pacejka94()]:
+
+        # Serial reference, also used to check that the parallel results are identical
+        start_time = time.perf_counter()
+        reference = model.solve(state, SolverMode.All)
+        serial_time = time.perf_counter() - start_time
+        reference_fy = np.asarray(reference.FY)
+
+        print('{0}: {1} points, serial solve {2:.2f} s'.format(model.Name, len(reference_fy), serial_time))
+        print('{0:>10} | {1:>10} | {2:>10} | {3:>10}'.format('Workers', 'Time [s]', 'Speedup', 'Efficiency'))
+        print('=' * 49)
+
+        for workers in worker_counts:
+            with ParallelSweep(model, processes=workers) as sweep:
+                # Start the pool (and ship the coefficients) before timing
+                sweep.solve(TireState(FZ=[4000], IA=[0], V=[10], P=[200000], SR=[0], SA=[0]))
+
+                start_time = time.perf_counter()
+                result = sweep.solve(state, SolverMode.All)
+                parallel_time = time.perf_counter() - start_time
+
+            assert np.array_equal(result.FY, reference_fy)
+
+            print('{0:>10d} | {1:>10.2f} | {2:>10.2f} | {3:>10.2f}'.format(workers, parallel_time,
+                                                                         serial_time / parallel_time,
+                                                                         serial_time / parallel_time / workers))
+        print('')
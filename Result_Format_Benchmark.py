@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode
+from src.Core import TireState, TireStateBatch
+
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    state = TireState()
+    state.FZ = list(np.linspace(1000.0, 8000.0, 20))
+    state.IA = [0.0, 0.05]
+    state.V = [16.6]
+    state.P = [200000]
+    state.SR = list(np.linspace(-0.2, 0.2, 50))
+    state.SA = list(np.linspace(-0.3, 0.3, 500))
+
+    print('OpenTire Result Format Benchmark, {0} points\n'.format(20 * 2 * 50 * 500))
+    print('{0:>10} | {1:>10} | {2:>10} | {3:>12}'.format('Output', 'Solve [s]', 'Convert [s]', 'Shares buffer'))
+    print('=' * 52)
+
+    batch = model.solve(state, SolverMode.All, output='batch')
+
+    for output in TireStateBatch.OUTPUT_FORMATS:
+        try:
+            # Imports pandas or pyarrow before timing
+            batch[:1].to_format(output)
+        except ImportError as error:
+            print('{0:>10} | skipped, {1}'.format(output, error))
+            continue
+
+        start_time = time.perf_counter()
+        result = model.solve(state, SolverMode.All, output=output)
+        solve_time = time.perf_counter() - start_time
+
+        # Conversion of an already solved batch, and whether the result is a view of the batch buffer
+        start_time = time.perf_counter()
+        converted = batch.to_format(output)
+        convert_time = time.perf_counter() - start_time
+
+        if output == 'batch':
+            fy = converted.FY
+        elif output == 'arrow':
+            fy = converted.column('FY').chunk(0).to_numpy()
+        else:
+            fy = np.asarray(converted['FY'])
+
+        assert np.array_equal(fy, batch.FY)
+        print('{0:>10} | {1:>10.3f} | {2:>11.4f} | {3:>12}'.format(output, solve_time, convert_time,
+                                                                 str(np.shares_memory(fy, batch.data))))
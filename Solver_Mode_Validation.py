@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode
+from src.Core import TireState, TireStateBatch
+
+import numpy as np
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    # Operating points with combined slip, where the pure and combined forces differ
+    state = TireState(FZ=np.linspace(1000.0, 8000.0, 8)[:, np.newaxis], IA=0.03, V=16.6,
+                      SA=np.linspace(-0.3, 0.3, 25), SR=0.1)
+    pure = {SolverMode.PureFy: 'FY', SolverMode.PureFx: 'FX', SolverMode.PureMz: 'MZ', SolverMode.PureMx: 'MX'}
+    combined = [SolverMode.Fy, SolverMode.Fx, SolverMode.Fy | SolverMode.Fx | SolverMode.Mz | SolverMode.Mx,
+                SolverMode.All]
+
+    print('OpenTire Solver Mode Validation\n')
+
+    # Every pure output has to be the same whichever combined outputs are requested with it
+    for output, field in pure.items():
+        reference = getattr(model.solve_batch(TireStateBatch.from_state(state)[0], output), field).copy()
+
+        for other in combined:
+            if (other & output) or field in SolverMode(other).fields():
+                continue
+
+            result = getattr(model.solve_batch(TireStateBatch.from_state(state)[0], output | other), field)
+            assert np.array_equal(result, reference), (output, other)
+
+        print('{0:>8}: unchanged by combined outputs'.format(field))
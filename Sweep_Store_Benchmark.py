@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode, SweepStore
+from src.Core import TireState
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+
+class InterruptedModel(PAC2002):
+    # Stops the sweep after a number of chunks, as a job killed overnight would
+
+    def __init__(self, chunks):
+        PAC2002.__init__(self)
+        self.chunks = chunks
+
+    def solve_batch(self, state, mode=SolverMode.All, ctx=None):
+        if self.chunks == 0:
+            raise KeyboardInterrupt
+        self.chunks -= 1
+        return PAC2002.solve_batch(self, state, mode, ctx)
+
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    state = TireState()
+    state.FZ = list(np.linspace(1000.0, 8000.0, 8))
+    state.IA = [0.0, 0.025, 0.05]
+    state.V = [16.6]
+    state.P = [200000]
+    state.SR = list(np.linspace(-0.2, 0.2, 41))
+    state.SA = list(np.linspace(-0.3, 0.3, 601))
+    mode = SolverMode.All
+
+    file_format = 'npz'
+
+    # Every file format whose module imports, npz needs NumPy only
+    file_formats = ['npz']
+    for name, module in (('parquet', 'pyarrow'), ('hdf5', 'h5py')):
+        try:
+            __import__(module)
+            file_formats.append(name)
+        except ImportError:
+            pass
+
+    directory = tempfile.mkdtemp()
+    try:
+        print('OpenTire Sweep Store Benchmark, {0} points, {1} files\n'.format(8 * 3 * 41 * 601, file_format))
+
+        store = SweepStore(directory, file_format)
+        start_time = time.perf_counter()
+        try:
+            store.run(InterruptedModel(5), state, mode)
+        except KeyboardInterrupt:
+            pass
+        interrupted_time = time.perf_counter() - start_time
+
+        store = SweepStore(directory, file_format)
+        start_time = time.perf_counter()
+        solved = store.run(model, state, mode)
+        resumed_time = time.perf_counter() - start_time
+
+        size = sum(os.path.getsize(os.path.join(directory, fname)) for fname in os.listdir(directory))
+        print('Interrupted run:  {0:6.2f} s, 5 chunks written'.format(interrupted_time))
+        print('Resumed run:      {0:6.2f} s, {1} chunks written, complete: {2}'.format(resumed_time, solved,
+                                                                                     store.complete))
+        print('Size on disk:     {0:6.1f} MB ({1:.1f} MB in memory)\n'.format(
+            size / 1e6, 8 * 3 * 41 * 601 * len(SolverMode(mode).fields() + model.GRID_AXES) * 8 / 1e6))
+
+        reference = model.solve(state, mode, output='batch')
+
+        start_time = time.perf_counter()
+        full = store.read()
+        full_time = time.perf_counter() - start_time
+        assert np.array_equal(full.FY, reference.FY) and np.array_equal(full.MZ, reference.MZ)
+
+        start_time = time.perf_counter()
+        part = store.read(FZ=state.FZ[3], IA=state.IA[1])
+        slice_time = time.perf_counter() - start_time
+        selected = (reference.FZ == state.FZ[3]) & (reference.IA == state.IA[1])
+        assert np.array_equal(part.FY, reference.FY[selected])
+
+        print('Read all:         {0:6.3f} s, {1} points'.format(full_time, len(full)))
+        print('Read one FZ, IA:  {0:6.3f} s, {1} points\n'.format(slice_time, len(part)))
+
+        # Same sweep in every format, with row groups smaller than the chunks, read back at a slice that spans
+        # several chunks and row groups, compared with the npz result
+        state.SA = list(np.linspace(-0.3, 0.3, 61))
+        results = dict()
+        for name in file_formats:
+            store = SweepStore(os.path.join(directory, name), name, row_group_size=1000)
+            start_time = time.perf_counter()
+            store.run(model, state, mode, chunk_size=4096)
+            run_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            results[name] = store.read(SR=state.SR[::4], IA=state.IA[2])
+            read_time = time.perf_counter() - start_time
+            same = np.array_equal(results[name].data, results['npz'].data)
+            print('{0:<8} run {1:6.3f} s, read slice {2:6.3f} s, {3} points, same as npz: {4}'.format(
+                name, run_time, read_time, len(results[name]), same))
+
+        missing = [name for name in ('parquet', 'hdf5') if name not in file_formats]
+        if missing:
+            print('Not installed: ' + ', '.join(missing))
+    finally:
+        shutil.rmtree(directory)
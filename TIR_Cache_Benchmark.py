@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002
+from src.Parsers import TIRFile, TIRCache
+from TIR_Parser_Benchmark import synthetic_tir
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Cache opened once per worker process by the pool initializer
+_worker_cache = None
+
+
+def _open_cache(directory):
+    global _worker_cache
+    _worker_cache = TIRCache(directory)
+
+
+def _nominal_loads(fnames):
+    # FNOMIN of every file and the number of files that had to be parsed
+    loads = [_worker_cache.load_parameters(fname)[1][0] for fname in fnames]
+    return loads, _worker_cache.misses
+
+
+if __name__ == "__main__":
+
+    count = 1000
+    directory = tempfile.mkdtemp()
+
+    try:
+        # Synthetic tire library, every file with its own random coefficient variation
+        model = PAC2002()
+        vector = model.get_parameter_vector()
+        names = list(model.get_parameters())
+        random = np.random.RandomState(0)
+        fnames = []
+        os.makedirs(os.path.join(directory, 'tir'))
+        for i in range(count):
+            values = vector * (1.0 + 0.05 * random.uniform(-1.0, 1.0, len(vector)))
+            fname = os.path.join(directory, 'tir', 'tire_{0:04d}.tir'.format(i))
+            with open(fname, 'w') as f:
+                f.write(synthetic_tir(dict(zip(names, values.tolist()))))
+            fnames.append(fname)
+
+        cache_directory = os.path.join(directory, 'cache')
+        print('OpenTire TIR Cache Benchmark, {0} synthetic PAC2002 files\n'.format(count))
+
+        start_time = time.perf_counter()
+        models = [TIRFile().load(fname) for fname in fnames]
+        parse_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        cache = TIRCache(cache_directory)
+        for fname in fnames:
+            cache.load_parameters(fname)
+        cache.flush()
+        cold_time = time.perf_counter() - start_time
+
+        # A new process start: open the cache and look up every file again
+        start_time = time.perf_counter()
+        cache = TIRCache(cache_directory)
+        open_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        vectors = [cache.load_parameters(fname)[1] for fname in fnames]
+        lookup_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        cached_models = [cache.load(fname) for fname in fnames]
+        load_time = time.perf_counter() - start_time
+
+        print('TIRFile.load:                  {0:8.1f} us per file'.format(parse_time / count * 1e6))
+        print('First run (parse and store):   {0:8.1f} us per file'.format(cold_time / count * 1e6))
+        print('Open cache:                    {0:8.1f} ms'.format(open_time * 1e3))
+        print('Cached load_parameters:        {0:8.1f} us per file'.format(lookup_time / count * 1e6))
+        print('Cached load (model):           {0:8.1f} us per file'.format(load_time / count * 1e6))
+        print('Hits {0}, misses {1}\n'.format(cache.hits, cache.misses))
+
+        largest = max(np.max(np.abs(m.get_parameter_vector() - c.get_parameter_vector()))
+                      for m, c in zip(models, cached_models))
+        print('Largest difference to TIRFile.load: {0:g}'.format(largest))
+
+        # Touching a file without changing it keeps its row, the content hash still matches
+        os.utime(fnames[0])
+        cache.load_parameters(fnames[0])
+        print('After touching a file: hits {0}, misses {1}'.format(cache.hits, cache.misses))
+
+        # Worker processes open the same cache, the coefficient arrays are shared read-only through the page cache
+        with ProcessPoolExecutor(max_workers=2, initializer=_open_cache, initargs=(cache_directory,)) as executor:
+            results = list(executor.map(_nominal_loads, [fnames[0::2], fnames[1::2]]))
+        print('Process pool: {0} files loaded, {1} parsed'.format(sum(len(loads) for loads, misses in results),
+                                                                  sum(misses for loads, misses in results)))
+    finally:
+        shutil.rmtree(directory)
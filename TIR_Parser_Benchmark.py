@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002
+from src.Parsers.TIRFile import TIRFile, COEFFICIENT_SECTIONS
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+SECTIONS = COEFFICIENT_SECTIONS['PAC2002']
+
+
+def synthetic_tir(parameters):
+    # A PAC2002 TIR file with the usual layout: header, quoted units, $ separators, ! comments, a table section and
+    # a key (FNOMIN) that is repeated in another section before its own
+    lines = ['[MDI_HEADER]', "FILE_TYPE                ='tir'", 'FILE_VERSION             =3.0',
+             "FILE_FORMAT              ='ASCII'", '! : TIRE_VERSION :      PAC2002', '! : COMMENT :           Synthetic',
+             '$' + '-' * 70 + 'units', '[UNITS]', "LENGTH                   ='meter'", "FORCE                    ='newton'",
+             "ANGLE                    ='radians'", '$' + '-' * 70 + 'operating conditions', '[OPERATING_CONDITIONS]',
+             'FNOMIN                   = 1                       $Not the nominal load', '$' + '-' * 70 + 'model',
+             '[MODEL]', "PROPERTY_FILE_FORMAT     ='PAC2002'", "TYRESIDE                 ='LEFT'"]
+
+    sections = dict()
+    for name, value in parameters.items():
+        section = next(section for section, match in SECTIONS if match(name))
+        sections.setdefault(section, []).append('{0:<25}= {1:<24.16g} ${2} coefficient'.format(name, value, name))
+
+    for section, match in SECTIONS:
+        if section == 'DIMENSION':
+            lines += ['$' + '-' * 70 + 'shape', '[SHAPE]', '{radial width}', ' 1.0    0.0', ' 1.0    0.4', ' 1.0    0.9']
+        if section == 'VERTICAL':
+            sections[section].append('VERTICAL_STIFFNESS       = 2.1e+05                 $Tyre vertical stiffness')
+        lines += ['$' + '-' * 70 + section.lower(), '[' + section + ']'] + sections.get(section, [])
+
+    return '\n'.join(lines) + '\n'
+
+
+def line_split_parse(fname):
+    # Reference: the parsing loop of the earlier TIRFile.load, one readlines and split per line, sections ignored.
+    # The values are converted to float afterwards, as it did when assigning them to the model.
+    tir = TIRFile()
+    with open(fname, 'r') as f:
+        tir_data = f.readlines()
+
+    for line in tir_data:
+        if "=" in line:
+            name, value, description = tir.ProcessParameterLine(line)
+            tir.Coefficients[name] = value
+            tir.Descriptions[name] = description
+        elif "!" in line:
+            tir.Comments += line
+
+    for name, value in tir.Coefficients.items():
+        try:
+            tir.Coefficients[name] = float(value)
+        except ValueError:
+            pass
+
+    return tir.Coefficients
+
+
+if __name__ == "__main__":
+
+    count = 10000
+    directory = tempfile.mkdtemp()
+
+    try:
+        # Synthetic tire library, every file with its own random coefficient variation
+        model = PAC2002()
+        vector = model.get_parameter_vector()
+        names = list(model.get_parameters())
+        random = np.random.RandomState(0)
+        fnames = []
+        for i in range(count):
+            values = vector * (1.0 + 0.05 * random.uniform(-1.0, 1.0, len(vector)))
+            fname = os.path.join(directory, 'tire_{0:05d}.tir'.format(i))
+            with open(fname, 'w') as f:
+                f.write(synthetic_tir(dict(zip(names, values.tolist()))))
+            fnames.append(fname)
+
+        print('OpenTire TIR Parser Benchmark, {0} synthetic PAC2002 files of {1:.1f} kB\n'.format(
+            count, os.path.getsize(fnames[0]) / 1024.0))
+
+        start_time = time.perf_counter()
+        for fname in fnames:
+            line_split_parse(fname)
+        reference_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        for fname in fnames:
+            with open(fname, 'r') as f:
+                TIRFile().parse(f.read())
+        parse_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        models = [TIRFile().load(fname) for fname in fnames]
+        load_time = time.perf_counter() - start_time
+
+        print('Line split reference: {0:8.2f} s  ({1:6.1f} us per file)'.format(reference_time, reference_time / count * 1e6))
+        print('TIRFile.parse:        {0:8.2f} s  ({1:6.1f} us per file)'.format(parse_time, parse_time / count * 1e6))
+        print('TIRFile.load (model): {0:8.2f} s  ({1:6.1f} us per file)\n'.format(load_time, load_time / count * 1e6))
+
+        # The repeated key stays in its own section, the model gets the one from [VERTICAL]
+        tir = TIRFile()
+        tir.load(fnames[0])
+        print('FNOMIN: [VERTICAL] {0:.1f}, [OPERATING_CONDITIONS] {1:.1f}, model {2:.1f}'.format(
+            tir.Sections['VERTICAL']['FNOMIN'], tir.Sections['OPERATING_CONDITIONS']['FNOMIN'], models[0].FNOMIN))
+        print('Sections: ' + ', '.join(tir.Sections))
+    finally:
+        shutil.rmtree(directory)
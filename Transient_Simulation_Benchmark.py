@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode, TransientSimulation
+from src.Core import TireStateBatch
+
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+
+    # Step steer of 3 deg at 0.1 s, 20 m/s, 4000 N, free rolling
+    dt = 0.001
+    time_axis = np.arange(0.0, 0.5, dt)
+    speed = 20.0
+    steer = np.where(time_axis >= 0.1, np.radians(3.0), 0.0)
+
+    state = TireStateBatch(1)
+    state.FZ = 4000.0
+    state.V = speed
+    state.SA = np.radians(3.0)
+    model.solve_batch(state)
+
+    simulation = TransientSimulation(model, dt)
+    result = simulation.run(speed, steer, speed / state.RE[0], 4000.0)
+
+    # Time for the slip angle to reach 63 % of the steer input, which is sigma_alpha / V for a first order lag
+    rise = time_axis[np.argmax(result.SA[:, 0] >= 0.632 * np.radians(3.0))] - 0.1
+    print('OpenTire Transient Simulation Benchmark\n')
+    print('Step steer: steady state FY {0:.0f} N, final {1:.0f} N'.format(state.FY[0], result.FY[-1, 0]))
+    print('63 % rise time of the slip angle {0:.1f} ms, sigma_alpha / V = {1:.1f} ms\n'.format(
+        rise * 1e3, state.SIGMA_ALPHA[0] / speed * 1e3))
+
+    # Throughput: 1 s of simulated time at 1 kHz, steering and braking inputs different for every tire
+    duration = 1.0
+    steps = int(duration / dt)
+    random = np.random.RandomState(0)
+    print('{0:>6} {1:>10} {2:>12} {3:>16}'.format('Tires', 'Steps/s', 'Real time x', 'Tire steps/s'))
+
+    for tires in (1, 4, 64, 1024, 8192):
+        steer = np.outer(np.sin(np.linspace(0.0, 4.0 * np.pi, steps)), random.uniform(-0.1, 0.1, tires))
+        wheel_speed = speed / 0.33 * (1.0 - np.outer(np.linspace(0.0, 0.1, steps), random.uniform(0.0, 1.0, tires)))
+        loads = random.uniform(2000.0, 6000.0, (1, tires))
+
+        start_time = time.perf_counter()
+        simulation.run(speed, steer, wheel_speed, loads)
+        elapsed = time.perf_counter() - start_time
+
+        print('{0:>6} {1:>10.0f} {2:>12.2f} {3:>16.3g}'.format(tires, steps / elapsed, duration / elapsed,
+                                                               tires * steps / elapsed))
+
+    # Forces only, without the moments
+    simulation = TransientSimulation(model, dt, SolverMode.Fx | SolverMode.Fy)
+    start_time = time.perf_counter()
+    simulation.run(speed, steer, wheel_speed, loads)
+    elapsed = time.perf_counter() - start_time
+    print('\nFX and FY only, {0} tires: {1:.0f} steps/s, {2:.2f} x real time'.format(len(loads[0]), steps / elapsed,
+                                                                                    duration / elapsed))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+from src.TireModel import PAC2002, SolverMode, VehicleSolver, QuasiStaticVehicle
+from src.Core import TireState
+
+import time
+import numpy as np
+
+if __name__ == "__main__":
+
+    model = PAC2002()
+    vector = model.get_parameter_vector()
+
+    # Different tires front and rear, the same on both sides
+    front = vector.copy()
+    rear = vector * 1.03
+    coefficients = np.array([front, front, rear, rear])
+
+    # Monte-Carlo fleet: random vehicle parameters and random combined slip at every wheel
+    vehicles = 10000
+    random = np.random.RandomState(0)
+    vehicle = QuasiStaticVehicle(mass=random.uniform(1200.0, 2000.0, vehicles), wheelbase=2.7,
+                                 cg_to_front=random.uniform(1.1, 1.5, vehicles), cg_height=0.55, track_front=1.6,
+                                 track_rear=1.58, roll_stiffness_front=random.uniform(0.5, 0.7, vehicles))
+
+    state = TireState()
+    state.SA = random.uniform(-0.05, 0.05, (vehicles, 1)) + np.array([0.005, 0.005, 0.0, 0.0])
+    state.SR = random.uniform(-0.05, 0.02, (vehicles, 1)) * np.ones(len(coefficients))
+    state.V = 25.0
+    mode = SolverMode.Fx | SolverMode.Fy | SolverMode.Mz
+
+    print('OpenTire Vehicle Solver Benchmark, {0} vehicles x 4 wheels\n'.format(vehicles))
+
+    solver = VehicleSolver(model, coefficients)
+    start_time = time.perf_counter()
+    result, converged = solver.solve_load_transfer(state, vehicle, mode)
+    vectorized_time = time.perf_counter() - start_time
+
+    # Reference: one model per wheel and a Python loop over the load transfer iteration, for a subset of vehicles
+    models = []
+    for wheel in coefficients:
+        wheel_model = PAC2002()
+        wheel_model.set_parameter_vector(wheel)
+        models.append(wheel_model)
+
+    subset = 200
+    start_time = time.perf_counter()
+    loop_loads = np.empty((subset, 4))
+    for index in range(subset):
+        loads = vehicle.static_loads([index])[0]
+        for iteration in range(solver.max_iterations):
+            forces = [wheel_model.solve_batch(TireState(SA=state.SA[index, wheel], SR=state.SR[index, wheel],
+                                                        FZ=loads[wheel], V=state.V), mode)
+                      for wheel, wheel_model in enumerate(models)]
+            new_loads = vehicle.wheel_loads(np.array([[f.FX for f in forces]]), np.array([[f.FY for f in forces]]),
+                                            [index])[0]
+            if np.max(np.abs(new_loads - loads)) < solver.tolerance:
+                break
+            loads = new_loads
+        loop_loads[index] = loads
+    loop_time = (time.perf_counter() - start_time) * vehicles / subset
+
+    print('Python loop (extrapolated): {0:8.2f} s'.format(loop_time))
+    print('VehicleSolver:              {0:8.2f} s  ({1:.0f} vehicles/s)'.format(vectorized_time,
+                                                                              vehicles / vectorized_time))
+    print('Converged: {0} of {1}'.format(np.count_nonzero(converged), vehicles))
+    print('Largest load difference to the loop: {0:.3g} N\n'.format(np.max(np.abs(result.FZ[:subset] - loop_loads))))
+
+    residual = vehicle.wheel_loads(result.FX, result.FY) - result.FZ
+    print('Largest load residual: {0:.3f} N'.format(np.max(np.abs(residual))))
+    print('Wheel loads of the first vehicle: ' + ', '.join('{0:.0f} N'.format(load) for load in result.FZ[0]))
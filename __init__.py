@@ -1,4 +1,5 @@
 from . import src
 from .src.TireModel import PAC2002, Pacejka94
 from .src.Core.tirestate import TireState
+from .src.Core.tirestatebatch import TireStateBatch
 
@@ -1,3 +1,5 @@
 __author__ = 'henningo'
 
 from .tirestate import TireState
+from .tirestatebatch import TireStateBatch
+from .sweepgrid import SweepGrid
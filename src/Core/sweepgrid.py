@@ -0,0 +1,59 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from .tirestatebatch import TireStateBatch
+
+# Default number of operating points evaluated at a time. Large enough to amortize the interpreter overhead,
+# small enough that the intermediate arrays of a full solve stay in the order of tens of megabytes.
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class SweepGrid(object):
+    """Full factorial sweep over a set of TireState axes.
+
+    Only the axis values are stored. Operating points are generated on demand from their flat index, with the
+    last axis varying fastest, so memory use depends on the chunk size and not on the grid size.
+    """
+
+    def __init__(self, axes):
+        # axes is a sequence of (name, values) pairs, ordered from slowest to fastest varying
+        self.names = tuple(name for name, values in axes)
+        self.axes = tuple(np.atleast_1d(np.asarray(values, dtype=float)) for name, values in axes)
+        self.shape = tuple(axis.size for axis in self.axes)
+        self.size = int(np.prod(self.shape))
+
+    @classmethod
+    def from_state(cls, input_state, names=('FZ', 'IA', 'V', 'P', 'SR', 'SA')):
+        """Create a grid from a TireState whose attributes are lists (or scalars) of axis values"""
+        return cls([(name, getattr(input_state, name)) for name in names])
+
+    def __len__(self):
+        return self.size
+
+    def chunk_bounds(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield (start, stop) flat index ranges covering the grid"""
+        for start in range(0, self.size, chunk_size):
+            yield start, min(start + chunk_size, self.size)
+
+    def expand(self, start=0, stop=None, out=None):
+        """Return the operating points [start, stop) of the grid as a TireStateBatch.
+
+        If out is given the axis columns are written into it (e.g. a slice of a larger result batch).
+        """
+        if stop is None:
+            stop = self.size
+
+        if out is None:
+            out = TireStateBatch(stop - start)
+
+        indices = np.unravel_index(np.arange(start, stop), self.shape)
+        for name, axis, index in zip(self.names, self.axes, indices):
+            setattr(out, name, axis[index])
+
+        return out
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield the grid as consecutive TireStateBatch chunks of at most chunk_size points"""
+        for start, stop in self.chunk_bounds(chunk_size):
+            yield self.expand(start, stop)
@@ -1,7 +1,12 @@
 __author__ = 'henningo'
 
 class TireState():
-    def __init__(self, FX=0, FY=0, FZ=0, MX=0, MY=0, MZ=0, SA=0, SR=0, IA=0, V=0, P=0):
+    # Fixed attribute set, single point states are created often and don't need a per-instance dict
+    __slots__ = ('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ', 'SA', 'SR', 'IA', 'V', 'P', 'RL', 'RE', 'SIGMA_ALPHA',
+                 'SIGMA_KAPPA')
+
+    def __init__(self, FX=0, FY=0, FZ=0, MX=0, MY=0, MZ=0, SA=0, SR=0, IA=0, V=0, P=0, RL=0, RE=0, SIGMA_ALPHA=0,
+                 SIGMA_KAPPA=0):
         self.FX = FX
         self.FY = FY
         self.FZ = FZ
@@ -13,3 +18,7 @@ class TireState():
         self.IA = IA
         self.V = V
         self.P = P
+        self.RL = RL
+        self.RE = RE
+        self.SIGMA_ALPHA = SIGMA_ALPHA
+        self.SIGMA_KAPPA = SIGMA_KAPPA
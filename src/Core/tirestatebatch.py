@@ -0,0 +1,143 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+
+class _Column(object):
+    # Exposes one row of the batch buffer as an attribute. Assigning to the attribute writes into the
+    # preallocated buffer instead of rebinding it, so solvers can keep using "state.FY = ..."
+
+    def __init__(self, index):
+        self.index = index
+
+    def __get__(self, batch, owner):
+        if batch is None:
+            return self
+        return batch.data[self.index]
+
+    def __set__(self, batch, value):
+        batch.data[self.index] = value
+
+
+class TireStateBatch(object):
+    """Columnar (struct-of-arrays) batch of tire states, backed by a single preallocated 2-D NumPy buffer.
+
+    The attributes have the same names as TireState, but every attribute is a contiguous array view into
+    the buffer. This means a batch can be passed to any calculate_* method in place of a scalar TireState.
+    A batch can also be laid over a structured array (from_records), its attributes are then strided views.
+    """
+
+    FIELDS = ('FX', 'FY', 'FZ', 'MX', 'MY', 'MZ', 'SA', 'SR', 'IA', 'V', 'P', 'RL', 'RE', 'SIGMA_ALPHA',
+              'SIGMA_KAPPA')
+
+    # One row of the batch as a structured array element, see from_records and to_records
+    DTYPE = np.dtype([(name, np.float64) for name in FIELDS])
+
+    # Result formats of to_format
+    OUTPUT_FORMATS = ('batch', 'records', 'dataframe', 'arrow')
+
+    __slots__ = ('data',)
+
+    FX = _Column(0)
+    FY = _Column(1)
+    FZ = _Column(2)
+    MX = _Column(3)
+    MY = _Column(4)
+    MZ = _Column(5)
+    SA = _Column(6)
+    SR = _Column(7)
+    IA = _Column(8)
+    V = _Column(9)
+    P = _Column(10)
+    RL = _Column(11)
+    RE = _Column(12)
+    SIGMA_ALPHA = _Column(13)
+    SIGMA_KAPPA = _Column(14)
+
+    def __init__(self, size=0, data=None):
+        if data is None:
+            data = np.zeros((len(self.FIELDS), size))
+
+        self.data = data
+
+    @classmethod
+    def from_state(cls, state, shape=()):
+        """Flat batch holding the fields of state (a TireState with scalar or array fields, or a TireStateBatch),
+        broadcast against each other and against shape.
+
+        Returns the batch and the broadcast shape, results can be reshaped to it to match the inputs.
+        """
+        columns = [np.asarray(getattr(state, name)) for name in cls.FIELDS]
+        shape = np.broadcast_shapes(shape, *[column.shape for column in columns])
+
+        batch = cls(int(np.prod(shape)))
+        for name, column in zip(cls.FIELDS, columns):
+            setattr(batch, name, np.broadcast_to(column, shape).ravel())
+
+        return batch, shape
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    def __getitem__(self, index):
+        # Slicing returns a batch that shares the buffer of this one
+        if isinstance(index, int):
+            index = slice(index, index + 1)
+
+        return TireStateBatch(data=self.data[:, index])
+
+    @classmethod
+    def empty(cls, size, output='batch'):
+        """Zeroed batch of size states, backed by a structured array if output is 'records' so that to_records
+        needs no copy, and by a column buffer otherwise"""
+        if output == 'records':
+            return cls.from_records(np.zeros(size, cls.DTYPE))
+
+        return cls(size)
+
+    @classmethod
+    def from_records(cls, records):
+        """Batch whose columns are views into records, a structured array of DTYPE. Values written to the batch
+        (e.g. by solve_batch) end up in records, which to_records then returns without a copy."""
+        return cls(data=records.view(np.float64).reshape(len(records), len(cls.FIELDS)).T)
+
+    def columns(self):
+        """Return a dictionary of column name to array view, no data is copied"""
+        return dict(zip(self.FIELDS, self.data))
+
+    def to_records(self):
+        """The batch as a structured array of DTYPE. No data is copied for a batch created by from_records, other
+        batches hold their columns one after the other and are copied into one."""
+        rows = self.data.T
+        if not rows.flags.c_contiguous:
+            rows = np.ascontiguousarray(rows)
+
+        return rows.view(self.DTYPE).reshape(len(self))
+
+    def to_dataframe(self, index=None):
+        """The batch as a pandas DataFrame of all fields, sharing the buffer of the batch where pandas allows it.
+        pandas is only imported here, it isn't needed for anything else."""
+        import pandas as pd
+
+        return pd.DataFrame(self.data.T, index=index, columns=list(self.FIELDS), copy=False)
+
+    def to_arrow(self):
+        """The batch as a pyarrow Table of all fields. The columns of the batch are contiguous, so pyarrow wraps
+        them without a copy (a batch created by from_records is copied). pyarrow is only imported here."""
+        import pyarrow as pa
+
+        return pa.Table.from_arrays([pa.array(column) for column in self.data], names=list(self.FIELDS))
+
+    def to_format(self, output, index=None):
+        """The batch in one of the result formats of OUTPUT_FORMATS: 'batch' (the batch itself), 'records',
+        'dataframe' or 'arrow'. index is used by 'dataframe' only."""
+        if output == 'batch':
+            return self
+        if output == 'records':
+            return self.to_records()
+        if output == 'dataframe':
+            return self.to_dataframe(index)
+        if output == 'arrow':
+            return self.to_arrow()
+
+        raise ValueError('Unknown output format ' + repr(output))
@@ -0,0 +1,4 @@
+__author__ = 'henningo'
+
+from .fitstage import FitStage, default_stages
+from .modelfitter import ModelFitter, StageResult
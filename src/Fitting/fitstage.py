@@ -0,0 +1,66 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..TireModel import PAC2002, Pacejka94, SolverMode
+
+
+class FitStage(object):
+    """One stage of a staged fit: a group of coefficients fitted against one measured output.
+
+    Only the measured points where all the columns in zero_slip are (close to) zero are used, which is how the pure
+    slip stages pick the pure slip part of a combined data set. The other coefficients are held at their current
+    values, so later stages build on the results of earlier ones.
+    """
+
+    def __init__(self, name, output, mode, parameters, zero_slip=()):
+        self.name = name
+        self.output = output
+        self.mode = mode
+        self.parameters = tuple(parameters)
+        self.zero_slip = tuple(zero_slip)
+
+    def select(self, data, tolerance):
+        """Return the indices of the points of data (a TireStateBatch) used by this stage"""
+        mask = np.isfinite(getattr(data, self.output))
+        for name in self.zero_slip:
+            mask &= np.abs(getattr(data, name)) <= tolerance
+
+        return np.flatnonzero(mask)
+
+
+# Pure slip first, then the combined slip weighting functions on top of the fitted pure slip coefficients
+PAC2002_STAGES = (
+    FitStage('Pure Fy', 'FY', SolverMode.PureFy,
+             ('PCY1', 'PDY1', 'PDY2', 'PDY3', 'PEY1', 'PEY2', 'PEY3', 'PEY4', 'PKY1', 'PKY2', 'PKY3', 'PHY1', 'PHY2',
+              'PHY3', 'PVY1', 'PVY2', 'PVY3', 'PVY4'), zero_slip=('SR',)),
+    FitStage('Pure Fx', 'FX', SolverMode.PureFx,
+             ('PCX1', 'PDX1', 'PDX2', 'PDX3', 'PEX1', 'PEX2', 'PEX3', 'PEX4', 'PKX1', 'PKX2', 'PKX3', 'PHX1', 'PHX2',
+              'PVX1', 'PVX2'), zero_slip=('SA',)),
+    FitStage('Pure Mz', 'MZ', SolverMode.PureMz,
+             ('QBZ1', 'QBZ2', 'QBZ3', 'QBZ4', 'QBZ5', 'QBZ9', 'QBZ10', 'QCZ1', 'QDZ1', 'QDZ2', 'QDZ3', 'QDZ4', 'QDZ6',
+              'QDZ7', 'QDZ8', 'QDZ9', 'QEZ1', 'QEZ2', 'QEZ3', 'QEZ4', 'QEZ5', 'QHZ1', 'QHZ2', 'QHZ3', 'QHZ4'),
+             zero_slip=('SR',)),
+    FitStage('Combined Fx', 'FX', SolverMode.Fx, ('RBX1', 'RBX2', 'RCX1', 'REX1', 'REX2', 'RHX1')),
+    FitStage('Combined Fy', 'FY', SolverMode.Fy,
+             ('RBY1', 'RBY2', 'RBY3', 'RCY1', 'REY1', 'REY2', 'RHY1', 'RHY2', 'RVY1', 'RVY2', 'RVY3', 'RVY4', 'RVY5',
+              'RVY6')),
+    FitStage('Combined Mz', 'MZ', SolverMode.Mz, ('SSZ1', 'SSZ2', 'SSZ3', 'SSZ4')),
+)
+
+# Pacejka 94 has no combined slip equations
+PACEJKA94_STAGES = (
+    FitStage('Pure Fy', 'FY', SolverMode.PureFy, ['a%d' % i for i in range(18)], zero_slip=('SR',)),
+    FitStage('Pure Fx', 'FX', SolverMode.PureFx, ['b%d' % i for i in range(14)], zero_slip=('SA',)),
+    FitStage('Pure Mz', 'MZ', SolverMode.PureMz, ['c%d' % i for i in range(21)], zero_slip=('SR',)),
+)
+
+
+def default_stages(model):
+    """Return the standard stages for fitting model"""
+    if isinstance(model, PAC2002):
+        return PAC2002_STAGES
+    if isinstance(model, Pacejka94):
+        return PACEJKA94_STAGES
+
+    raise ValueError('No default fit stages for ' + type(model).__name__)
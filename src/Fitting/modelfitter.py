@@ -0,0 +1,190 @@
+__author__ = 'henningo'
+
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..Core import TireState, TireStateBatch
+from ..Core.sweepgrid import DEFAULT_CHUNK_SIZE
+from .fitstage import default_stages
+
+# Problem evaluated by the functions below, set once per worker process by the pool initializer of each stage
+_worker_problem = None
+
+
+def _initialize_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _normal_equations(values, start, stop):
+    return _worker_problem.normal_equations(values, start, stop)
+
+
+def _cost(values, start, stop):
+    return _worker_problem.cost(values, start, stop)
+
+
+class _StageProblem(object):
+    # Least squares problem of one stage. The residuals are model output minus measured output, and are only formed
+    # for one chunk of points at a time, so memory use doesn't grow with the size of the data set.
+
+    def __init__(self, model, stage, data):
+        self.model = model
+        self.stage = stage
+        self.data = data
+        self.measured = getattr(data, stage.output).copy()
+
+    def __set_values(self, values):
+        self.model.set_parameters(dict(zip(self.stage.parameters, np.asarray(values).tolist())))
+
+    def normal_equations(self, values, start, stop):
+        # J^T J, J^T r and r^T r of the chunk, where J is the Jacobian of the residuals r
+        self.__set_values(values)
+        outputs, jacobian = self.model.calculate_parameter_jacobian(self.data[start:stop], self.stage.mode,
+                                                                    self.stage.parameters)
+        residuals = getattr(outputs, self.stage.output) - self.measured[start:stop]
+        J = jacobian.get(self.stage.output, np.zeros((stop - start, len(self.stage.parameters))))
+
+        return J.T @ J, J.T @ residuals, residuals @ residuals
+
+    def cost(self, values, start, stop):
+        self.__set_values(values)
+        state = self.model.solve_batch(TireStateBatch(data=self.data.data[:, start:stop].copy()), self.stage.mode)
+        residuals = getattr(state, self.stage.output) - self.measured[start:stop]
+
+        return residuals @ residuals
+
+
+class StageResult(object):
+    """Summary of one fitted stage"""
+
+    def __init__(self, name, parameters, points, iterations, seconds, rms_initial, rms_final, converged):
+        self.name = name
+        self.parameters = parameters  # Dictionary of the fitted coefficient values
+        self.points = points
+        self.iterations = iterations
+        self.seconds = seconds
+        self.rms_initial = rms_initial  # RMS residual before and after the stage
+        self.rms_final = rms_final
+        self.converged = converged
+
+    def __str__(self):
+        return '{0:<12} {1:>8d} points {2:>3d} coefficients {3:>4d} iterations {4:>8.2f} s   RMS {5:.4g} -> {6:.4g}{7}' \
+            .format(self.name, self.points, len(self.parameters), self.iterations, self.seconds, self.rms_initial,
+                    self.rms_final, '' if self.converged else '  (not converged)')
+
+
+class ModelFitter(object):
+    """Fits the coefficients of a model to measured data, one FitStage after the other.
+
+    The data is a TireStateBatch, or anything with TireState column names as keys (e.g. a pandas DataFrame or a
+    dictionary of arrays). Every stage is a Levenberg-Marquardt least squares fit of its coefficient group. Each
+    iteration needs one evaluation of the model Jacobian (calculate_parameter_jacobian) on the points of the stage,
+    which is accumulated chunk by chunk into the normal equations. With processes > 1 the chunks are spread over a
+    pool of worker processes, which receive the model and the stage data once per stage.
+
+    The fitted coefficients are set on the model.
+    """
+
+    def __init__(self, model, stages=None, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, max_iterations=100,
+                 tolerance=1e-6, zero_slip=1e-3):
+        self.model = model
+        self.stages = stages if stages is not None else default_stages(model)
+        self.processes = processes if processes is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance  # Relative cost reduction at which a stage has converged
+        self.zero_slip = zero_slip  # Largest slip still considered zero when selecting pure slip points
+
+    def fit(self, data):
+        """Fit all stages in order and return a list with a StageResult per stage"""
+        if not isinstance(data, TireStateBatch):
+            data = TireState(**dict((name, data[name]) for name in TireStateBatch.FIELDS if name in data))
+        data, shape = TireStateBatch.from_state(data)
+
+        return [self.fit_stage(stage, data) for stage in self.stages]
+
+    def fit_stage(self, stage, data):
+        """Fit a single FitStage to data (a TireStateBatch) and return its StageResult"""
+        start_time = time.perf_counter()
+
+        # Trial steps are evaluated on a copy, the model only gets the fitted coefficients
+        problem = _StageProblem(copy.copy(self.model), stage, data[stage.select(data, self.zero_slip)])
+        points = len(problem.data)
+        bounds = [(start, min(start + self.chunk_size, points)) for start in range(0, points, self.chunk_size)]
+
+        values = np.array([getattr(self.model, name) for name in stage.parameters], dtype=float)
+        if points == 0:
+            return StageResult(stage.name, dict(zip(stage.parameters, values)), 0, 0, 0.0, np.nan, np.nan, False)
+
+        executor = None
+        if self.processes > 1 and len(bounds) > 1:
+            executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_initialize_worker,
+                                           initargs=(problem,))
+
+        def evaluate(function, method, values):
+            # Sum of the chunk results, each result is a tuple of partial sums (or a single one)
+            if executor is None:
+                results = [method(values, start, stop) for start, stop in bounds]
+            else:
+                results = list(executor.map(function, [values] * len(bounds), [start for start, stop in bounds],
+                                            [stop for start, stop in bounds]))
+            if isinstance(results[0], tuple):
+                return tuple(sum(parts) for parts in zip(*results))
+            return sum(results)
+
+        try:
+            values, iterations, cost_initial, cost, converged = self.__levenberg_marquardt(
+                values, lambda x: evaluate(_normal_equations, problem.normal_equations, x),
+                lambda x: evaluate(_cost, problem.cost, x))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        parameters = dict(zip(stage.parameters, values.tolist()))
+        self.model.set_parameters(parameters)
+
+        return StageResult(stage.name, parameters, points, iterations, time.perf_counter() - start_time,
+                           np.sqrt(cost_initial / points), np.sqrt(cost / points), converged)
+
+    def __levenberg_marquardt(self, values, normal_equations, cost_function):
+        A, g, cost = normal_equations(values)
+        cost_initial = cost
+        damping = 1e-3
+        converged = False
+
+        for iteration in range(1, self.max_iterations + 1):
+
+            # Marquardt scaling, coefficients the data doesn't constrain get a small floor so the system stays solvable
+            scale = np.maximum(np.diag(A), 1e-12 * max(np.max(np.diag(A)), 1e-300))
+
+            while True:
+                try:
+                    step = np.linalg.solve(A + damping * np.diag(scale), -g)
+                except np.linalg.LinAlgError:
+                    step = np.linalg.lstsq(A + damping * np.diag(scale), -g, rcond=None)[0]
+
+                trial_cost = cost_function(values + step)
+                if trial_cost < cost:
+                    break
+
+                # Failed step (worse or NaN cost), fall back towards gradient descent. No step improving the cost
+                # is left once the damping is this large, the stage has stalled without converging.
+                damping *= 10.0
+                if damping > 1e12:
+                    return values, iteration, cost_initial, cost, False
+
+            values = values + step
+            damping = max(damping / 10.0, 1e-12)
+            improvement = cost - trial_cost
+
+            A, g, cost = normal_equations(values)
+            if improvement <= self.tolerance * cost:
+                converged = True
+                break
+
+        return values, iteration, cost_initial, cost, converged
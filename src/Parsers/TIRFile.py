@@ -1,61 +1,162 @@
 __author__ = 'henningo'
 
-from src import OpenTire
 import os
+import re
+
+from ..TireModel import PAC2002, Pacejka94
+
+# Tire model class for every PROPERTY_FILE_FORMAT
+MODEL_FORMATS = {'PAC2002': PAC2002, 'PAC94': Pacejka94}
+
+# TIR section of the coefficients of every model format, by upper case name (checked in order, first match wins)
+COEFFICIENT_SECTIONS = {
+    'PAC2002': (
+        ('MODEL', lambda name: name == 'LONGVL'),
+        ('DIMENSION', lambda name: name == 'UNLOADED_RADIUS'),
+        ('VERTICAL', lambda name: name in ('FNOMIN', 'QV1', 'QV2', 'QFCX', 'QFCY', 'QFCG', 'QFZ1', 'QFZ2', 'BREFF',
+                                           'DREFF', 'FREFF')),
+        ('SCALING_COEFFICIENTS', lambda name: name.startswith('L')),
+        ('OVERTURNING_COEFFICIENTS', lambda name: name.startswith('QSX')),
+        ('ROLLING_COEFFICIENTS', lambda name: name.startswith('QSY')),
+        ('ALIGNING_COEFFICIENTS', lambda name: name.startswith('Q') or name.startswith('SSZ')),
+        ('LONGITUDINAL_COEFFICIENTS', lambda name: re.search(r'X\d*$', name) is not None),
+        ('LATERAL_COEFFICIENTS', lambda name: re.search(r'Y\d*$', name) is not None),
+        ('TURNSLIP_COEFFICIENTS', lambda name: True),
+    ),
+    'PAC94': (
+        ('LATERAL_COEFFICIENTS', lambda name: name.startswith('A')),
+        ('LONGITUDINAL_COEFFICIENTS', lambda name: name.startswith('B')),
+        ('ALIGNING_COEFFICIENTS', lambda name: name.startswith('C')),
+    ),
+}
+
+# One regular expression for the whole file, all matches are collected in a single findall pass. Each match is a
+# [SECTION] header, a KEY = VALUE line (the value optionally quoted, followed by an optional $ or ! description) or a
+# ! comment line. Everything else, e.g. $---- separators and the rows of table sections, is skipped.
+_TIR_LINE = re.compile(r"""
+    ^[ \t]*(?:
+        \[(?P<section>[^\]\n]*)\]
+      | (?P<key>[A-Za-z_]\w*)[ \t]*=[ \t]*(?:'(?P<string>[^'\n]*)'[ \t]*|(?P<value>[^$!\n]*))
+            (?:[$!][ \t]*(?P<description>[^\n]*))?
+      | !(?P<comment>[^\n]*)
+    )
+""", re.MULTILINE | re.VERBOSE)
+
 
 class TIRFile():
 
     def __init__(self, *args, **kwargs):
         self.template_file = 'TIR'
         self.tire_model = None
+        self.Sections = dict()
         self.Coefficients = dict()
         self.Descriptions = dict()
         self.Comments = ""
+        self.__repeated = set()
+
+    def parse(self, text):
+        """Parse the text of a TIR file into the per section index Sections ({section: {key: value}}).
+
+        Numeric values are converted to float, quoted values are kept as strings without the quotes. Coefficients
+        is a flat view of all sections, when a key appears in several sections the first one is kept there, the
+        others are only in Sections. Descriptions holds the text after $ (or !) on each line, by (section, key).
+        """
+        sections = self.Sections
+        coefficients = self.Coefficients
+        descriptions = self.Descriptions
+        comments = []
+        repeated = self.__repeated
+        current = sections.setdefault('', dict())
+        section = ''
+
+        # findall gives (section, key, string, value, description, comment) tuples, groups that didn't take part in
+        # the match are empty strings
+        for name, key, string, value, description, comment in _TIR_LINE.findall(text):
+            if key:
+                if string or not value:
+                    value = string
+                else:
+                    # float ignores the trailing whitespace, only other values need to be stripped
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        value = value.rstrip()
+
+                current[key] = value
+                if key not in coefficients:
+                    coefficients[key] = value
+                else:
+                    repeated.add(key)
+                if description:
+                    descriptions[(section, key)] = description.rstrip()
+
+            elif name:
+                section = name.strip().upper()
+                current = sections.setdefault(section, dict())
 
-    def load(self, fname, output=False):
+            else:
+                comments.append(comment.rstrip())
 
-        # Load a TIR-file and build a dictionary of parameters
-        f = open(fname, 'r')
-        tir_data = f.readlines()
-        f.close()
+        if not sections['']:
+            del sections['']
 
-        for line in tir_data:
-            if "=" in line:  # This means we have a parameter on the line
-                name, value, description = self.ProcessParameterLine(line)
-                self.Coefficients[name] = value
-                self.Descriptions[name] = description
+        self.Comments += ''.join('!' + comment + '\n' for comment in comments)
 
-            elif "!" in line: # This we have a comment
-                self.Comments += line
+        return sections
 
+    def load(self, fname, output=False):
+
+        # Load a TIR-file and build the section index, then a model with its coefficients
+        with open(fname, 'r') as f:
+            self.parse(f.read())
 
         if output is True:
             print(self.Comments)
-            print(self.Coefficients)
 
-        # Create the model based on type in TIR file
-        opentire = OpenTire()
-        self.Coefficients['PROPERTY_FILE_FORMAT'] = self.Coefficients['PROPERTY_FILE_FORMAT'].replace("'", "")
-        print(self.Coefficients['PROPERTY_FILE_FORMAT'])
-        tm = opentire.createmodel(self.Coefficients['PROPERTY_FILE_FORMAT'])
-        print(tm)
+        return self.create_model(output)
+
+    def model_format(self):
+        """PROPERTY_FILE_FORMAT of the parsed file, upper case as in MODEL_FORMATS"""
+        return str(self.Coefficients.get('PROPERTY_FILE_FORMAT', '')).strip().upper()
 
-        if tm == None:
+    def create_model(self, output=False):
+        """Create the model named by PROPERTY_FILE_FORMAT and assign the coefficients it has, None if the format
+        isn't known.
+
+        A key that appears in several sections is taken from the section of the coefficient (COEFFICIENT_SECTIONS),
+        e.g. FNOMIN from [VERTICAL] and not from [OPERATING_CONDITIONS], whatever their order in the file.
+        """
+        model_format = self.model_format()
+        if model_format not in MODEL_FORMATS:
             print("Model could not be recognized")
             return None
 
-        # Assign parameters to the model
-        for parameter_name in self.Coefficients:  # Loop over the parameters we found
+        tm = MODEL_FORMATS[model_format]()
 
-            if parameter_name in tm.Coefficients:  # See if it exists in tire model
-                tm.Coefficients[parameter_name] = float(self.Coefficients[parameter_name])  # Assign the value
+        # TIR keys are upper case, the Pacejka 94 coefficients aren't
+        names = dict((name.upper(), name) for name in tm.get_parameters())
 
-            else:
-                if output is True:
-                    print("Could not map parameter: " + str(parameter_name))
+        parameters = dict()
+        for parameter_name, value in self.Coefficients.items():  # Loop over the parameters we found
+            if parameter_name in self.__repeated:
+                value = self.__section_value(model_format, parameter_name, value)
+
+            if parameter_name.upper() in names and isinstance(value, float):  # See if it exists in tire model
+                parameters[names[parameter_name.upper()]] = value
+            elif output is True:
+                print("Could not map parameter: " + str(parameter_name))
+
+        tm.set_parameters(parameters)
 
         return tm
 
+    def __section_value(self, model_format, key, default):
+        # Value of a repeated key in the section its coefficient belongs to, default if the key isn't there
+        name = key.upper()
+        section = next((section for section, match in COEFFICIENT_SECTIONS[model_format] if match(name)), None)
+
+        return self.Sections.get(section, dict()).get(key, default)
+
     def ProcessParameterLine(self, linedata):
 
         parameter_name = "Parameter"
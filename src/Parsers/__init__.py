@@ -0,0 +1,5 @@
+__author__ = 'henningo'
+
+from .TIRFile import TIRFile
+from .tircache import TIRCache
+from .modelbank import ModelBank
@@ -0,0 +1,162 @@
+__author__ = 'henningo'
+
+import copy
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..Core import TireState, TireStateBatch, SweepGrid
+from ..Core.sweepgrid import DEFAULT_CHUNK_SIZE
+from ..TireModel import SolverMode
+from .TIRFile import TIRFile, MODEL_FORMATS
+
+
+def _load_files(fnames):
+    # (format, coefficient vector) of every file, (None, None) where the format isn't known
+    results = []
+    for fname in fnames:
+        tir = TIRFile()
+        model = tir.load(fname)
+        results.append((None, None) if model is None else (tir.model_format(), model.get_parameter_vector()))
+
+    return results
+
+
+class ModelBank(object):
+    """Coefficient sets of a library of tires of one model format, stacked into a (tires, coefficients) array.
+
+    Row i of coefficients holds the coefficients of tire names[i], in the order of the model's get_parameters.
+    from_directory and from_files parse the TIR files on a pool of worker processes, files found in a TIRCache
+    aren't parsed at all.
+
+    solve_batch and solve evaluate every tire at the same operating points. For PAC2002 all tires are evaluated in
+    one vectorized pass (PAC2002.solve_tires_batch), other formats one tire at a time.
+    """
+
+    def __init__(self, coefficients, names=(), model_format='PAC2002'):
+        if model_format not in MODEL_FORMATS:
+            raise ValueError('Unknown model format ' + repr(model_format))
+
+        self.model_format = model_format
+        self.coefficients = np.atleast_2d(np.asarray(coefficients, dtype=float))
+        self.names = list(names) or [str(index) for index in range(len(self.coefficients))]
+
+        self.__model = MODEL_FORMATS[model_format]()
+        self.__compiled = None
+
+    @classmethod
+    def from_directory(cls, directory, pattern='*.tir', model_format='PAC2002', processes=None, cache=None):
+        """Load all files in directory matching pattern, in alphabetical order, see from_files"""
+        return cls.from_files(sorted(glob.glob(os.path.join(directory, pattern))), model_format, processes, cache)
+
+    @classmethod
+    def from_files(cls, fnames, model_format='PAC2002', processes=None, cache=None, chunk_size=16):
+        """Load the TIR files fnames into a bank, each tire is named after its file.
+
+        The files are parsed in chunks of chunk_size files on processes worker processes (all cores by default, no
+        pool with processes=1). If cache (a TIRCache) is given, cached files are taken from it and the newly parsed
+        ones are added and flushed. Raises ValueError for a file that isn't of model_format.
+        """
+        fnames = list(fnames)
+        # (format, vector, cache entry) of every file, the entry of a file that isn't cached is passed on to add
+        found = [(None, None, None)] * len(fnames) if cache is None else [cache.lookup(fname) for fname in fnames]
+        missing = [index for index, (found_format, vector, entry) in enumerate(found) if found_format is None]
+
+        chunks = [[fnames[index] for index in missing[start:start + chunk_size]]
+                  for start in range(0, len(missing), chunk_size)]
+
+        processes = processes if processes is not None else os.cpu_count()
+        if processes == 1 or len(chunks) <= 1:
+            results = [_load_files(chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = list(executor.map(_load_files, chunks))
+
+        for index, result in zip(missing, [result for chunk in results for result in chunk]):
+            found[index] = result + found[index][2:]
+            if cache is not None and result[0] is not None:
+                cache.add(fnames[index], *found[index])
+
+        if missing and cache is not None:
+            cache.flush()
+
+        for fname, (found_format, vector, entry) in zip(fnames, found):
+            if found_format != model_format:
+                raise ValueError(fname + ' is not a ' + model_format + ' TIR file')
+
+        vectors = [vector for found_format, vector, entry in found]
+
+        return cls(np.array(vectors), [os.path.splitext(os.path.basename(fname))[0] for fname in fnames], model_format)
+
+    def __len__(self):
+        return len(self.coefficients)
+
+    def model(self, index):
+        """Model with the coefficients of tire index (a position or a name)"""
+        if not isinstance(index, (int, np.integer)):
+            index = self.names.index(index)
+
+        model = copy.copy(self.__model)
+        model.set_parameter_vector(self.coefficients[index])
+
+        return model
+
+    def models(self):
+        return [self.model(index) for index in range(len(self))]
+
+    def solve_batch(self, state, mode=SolverMode.All):
+        """Evaluate every tire at the operating points of state (a TireState or TireStateBatch).
+
+        Returns a TireState whose fields have the shape (tires,) + the broadcast shape of state, input fields are
+        read-only broadcast views of the state.
+        """
+        batch, shape = TireStateBatch.from_state(state)
+
+        if self.model_format == 'PAC2002':
+            point = self.__model.solve_tires_batch(self.__compile(), batch, mode)
+            columns = dict((name, getattr(point, name)) for name in TireStateBatch.FIELDS)
+        else:
+            points = [self.model(index).solve_batch(TireStateBatch(data=batch.data.copy()), mode)
+                      for index in range(len(self))]
+            columns = dict((name, np.array([getattr(point, name) for point in points]))
+                           for name in TireStateBatch.FIELDS)
+
+        result = TireState()
+        for name, column in columns.items():
+            setattr(result, name, np.broadcast_to(column, (len(self), len(batch))).reshape((len(self),) + shape))
+
+        return result
+
+    def solve(self, input_state, mode=SolverMode.All, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Solve the grid described by input_state for every tire, see PAC2002.solve_tires.
+
+        Returns a TireState with the grid columns as (points,) arrays and the outputs of mode as (tires, points)
+        arrays.
+        """
+        if self.model_format == 'PAC2002':
+            return self.__model.solve_tires(self.__compile(), input_state, mode, chunk_size)
+
+        grid = SweepGrid.from_state(input_state, self.__model.GRID_AXES)
+        fields = SolverMode(mode).fields()
+
+        result = TireState(**grid.expand().columns())
+        for name in fields:
+            setattr(result, name, np.empty((len(self), len(grid))))
+
+        for index in range(len(self)):
+            model = self.model(index)
+            for start, stop in grid.chunk_bounds(chunk_size):
+                state = model.solve_batch(grid.expand(start, stop), mode)
+                for name in fields:
+                    getattr(result, name)[index, start:stop] = getattr(state, name)
+
+        return result
+
+    def __compile(self):
+        # Compiled once, the coefficients of a bank aren't changed after it has been loaded
+        if self.__compiled is None:
+            self.__compiled = self.__model.compile_coefficient_sets(self.coefficients)
+
+        return self.__compiled
@@ -0,0 +1,219 @@
+__author__ = 'henningo'
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .TIRFile import TIRFile, MODEL_FORMATS
+
+# Layout version of the cache directory, a cache written with another version is ignored
+CACHE_VERSION = 1
+
+
+class TIRCache(object):
+    """On-disk cache of the coefficient sets parsed from TIR files, used in place of TIRFile.load.
+
+    The coefficients of every model format are stored as one (rows, coefficients) float array, <format>.npy, in the
+    order of the model's get_parameters, next to a small index.json. The index maps a file path to its modification
+    time, size and SHA-1 content hash, and a content hash to its row. A file whose path, mtime and size are in the
+    index is not read at all; when only the mtime changed, the content hash decides if the row can still be used.
+    Files with the same content share one row.
+
+    The arrays are memory mapped read-only, so looking up a cached set is a stat and a dictionary lookup, and all
+    processes opening the same cache directory (e.g. the workers of a process pool) share one copy through the page
+    cache. Newly parsed sets are kept in memory until flush, which rewrites the arrays and the index atomically.
+    Only one process should flush a cache directory at a time.
+
+    The rows of a format are dropped when the coefficient names of its model change. hits and misses count the
+    lookups so far.
+    """
+
+    INDEX = 'index.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+        self.__files = dict()
+        self.__rows = dict()
+        self.__arrays = dict()
+        self.__pending = dict()
+
+        # Default model of every format, cached models are copies of it, which is faster than the constructor
+        self.__models = dict((name, model()) for name, model in MODEL_FORMATS.items())
+        self.__names = dict((name, list(model.get_parameters())) for name, model in self.__models.items())
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        try:
+            with open(os.path.join(directory, self.INDEX)) as f:
+                index = json.load(f)
+        except (IOError, ValueError):
+            index = dict()
+
+        if index.get('version') != CACHE_VERSION:
+            return
+
+        # Only formats whose coefficients are unchanged since the cache was written are used
+        formats = set(name for name, names in index['formats'].items() if self.__names.get(name) == names)
+
+        for name in formats:
+            self.__arrays[name] = np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+
+        self.__rows = dict((key, tuple(row)) for key, row in index['rows'].items() if row[0] in formats)
+        self.__files = dict((path, entry) for path, entry in index['files'].items() if entry[2] in self.__rows)
+
+    def __len__(self):
+        return len(self.__files)
+
+    def load(self, fname):
+        """Model with the coefficients of the TIR file fname, None if its format isn't known"""
+        model_format, vector, entry = self.lookup(fname)
+        if model_format is not None:
+            model = copy.copy(self.__models[model_format])
+            model.set_parameter_vector(vector)
+            return model
+
+        model = TIRFile().load(fname)
+        if model is not None:
+            self.add(fname, self.__format(model), model.get_parameter_vector(), entry)
+
+        return model
+
+    def load_parameters(self, fname):
+        """(PROPERTY_FILE_FORMAT, coefficient vector) of the TIR file fname, (None, None) if its format isn't known.
+
+        The vector is ordered as the model's get_parameters, and is a read-only view into the cache when the file
+        was cached already.
+        """
+        model_format, vector, entry = self.lookup(fname)
+        if model_format is not None:
+            return model_format, vector
+
+        model = TIRFile().load(fname)
+        if model is None:
+            return None, None
+
+        model_format = self.__format(model)
+        vector = model.get_parameter_vector()
+        self.add(fname, model_format, vector, entry)
+
+        return model_format, vector
+
+    def get(self, fname):
+        """(PROPERTY_FILE_FORMAT, coefficient vector) of the TIR file fname if it is cached, (None, None) if it isn't.
+        The file is never parsed."""
+        return self.lookup(fname)[:2]
+
+    def lookup(self, fname):
+        """As get, with the index entry of the file (mtime, size and content hash) as a third value.
+
+        On a miss, pass the entry on to add once the file is parsed, so it isn't read and hashed a second time.
+        """
+        path = os.path.abspath(fname)
+        key, stat = self.__key(path)
+        entry = (stat.st_mtime_ns, stat.st_size, key)
+
+        if key not in self.__rows:
+            self.misses += 1
+            return None, None, entry
+
+        self.hits += 1
+        self.__files[path] = entry
+        model_format, row = self.__rows[key]
+
+        return model_format, self.__row(model_format, row), entry
+
+    def add(self, fname, model_format, vector, entry=None):
+        """Queue the coefficient vector of the TIR file fname, parsed elsewhere, for the next flush. entry is the one
+        returned by lookup, without it the file is hashed here."""
+        path = os.path.abspath(fname)
+        if entry is None:
+            key, stat = self.__key(path)
+            entry = (stat.st_mtime_ns, stat.st_size, key)
+        key = entry[2]
+
+        if key not in self.__rows:
+            pending = self.__pending.setdefault(model_format, [])
+            self.__rows[key] = (model_format, self.__count(model_format) + len(pending))
+            pending.append(np.array(vector, dtype=float))
+
+        self.__files[path] = entry
+
+    def __key(self, path):
+        # Content hash and stat of the file, the file is only read when its mtime or size isn't the indexed one
+        stat = os.stat(path)
+
+        entry = self.__files.get(path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2], stat
+
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest(), stat
+
+    def __format(self, model):
+        return next(name for name, model_class in MODEL_FORMATS.items() if type(model) is model_class)
+
+    def __count(self, model_format):
+        # Number of rows of the format that are on disk
+        array = self.__arrays.get(model_format)
+        return 0 if array is None else len(array)
+
+    def __row(self, model_format, row):
+        count = self.__count(model_format)
+        if row < count:
+            return self.__arrays[model_format][row]
+
+        return self.__pending[model_format][row - count]
+
+    def flush(self):
+        """Write the coefficient sets parsed since the last flush, and the index, to the cache directory"""
+        for model_format, pending in self.__pending.items():
+            if not pending:
+                continue
+
+            array = np.stack(pending)
+            if model_format in self.__arrays:
+                array = np.concatenate((self.__arrays[model_format], array))
+
+            fname = os.path.join(self.directory, model_format + '.npy')
+            self.__replace(fname, lambda f: np.save(f, array))
+            self.__arrays[model_format] = np.load(fname, mmap_mode='r')
+
+        self.__pending.clear()
+
+        index = {'version': CACHE_VERSION,
+                 'formats': dict((name, self.__names[name]) for name in self.__arrays),
+                 'rows': self.__rows,
+                 'files': self.__files}
+        self.__replace(os.path.join(self.directory, self.INDEX), lambda f: f.write(json.dumps(index).encode()))
+
+    def __replace(self, fname, write):
+        # Write into a temporary file next to fname and rename it, so readers never see a partial file. Memory maps
+        # of the old file stay valid.
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                write(f)
+            os.replace(temporary, fname)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def clear(self):
+        """Remove all cached coefficient sets, in memory and on disk"""
+        self.__files.clear()
+        self.__rows.clear()
+        self.__arrays.clear()
+        self.__pending.clear()
+
+        for fname in [name + '.npy' for name in MODEL_FORMATS] + [self.INDEX]:
+            fname = os.path.join(self.directory, fname)
+            if os.path.exists(fname):
+                os.remove(fname)
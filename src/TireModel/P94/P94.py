@@ -1,14 +1,26 @@
-from copy import deepcopy
-
 from .aligning_moment import AligningMoment
 from .pure_lateral import PureLateral
 from .pure_longitudinal import PureLongitudinal
 from ...Core.tirestate import TireState
+from ...Core.tirestatebatch import TireStateBatch
+from ...Core.sweepgrid import SweepGrid, DEFAULT_CHUNK_SIZE
 from ..tiremodelbase import TireModelBase
 from ..solvermode import SolverMode
+from ..dual import Dual, gradient_matrix
+
+import copy
+import numpy as np
+
+# All Pacejka 94 coefficients, lateral (a), longitudinal (b) and aligning moment (c), in parameter vector order
+COEFFICIENT_NAMES = tuple(['a%d' % i for i in range(18)] + ['b%d' % i for i in range(14)] +
+                          ['c%d' % i for i in range(21)])
+_COEFFICIENT_SET = frozenset(COEFFICIENT_NAMES)
 
 
 class Pacejka94(TireModelBase, PureLateral, PureLongitudinal, AligningMoment):
+    # Order of the sweep axes in solve, slowest varying first
+    GRID_AXES = ('FZ', 'IA', 'SR', 'SA')
+
     def __init__(self,
                  a0=30.4,
                  a1=0,
@@ -64,6 +76,9 @@ class Pacejka94(TireModelBase, PureLateral, PureLongitudinal, AligningMoment):
                  c19=0,
                  c20=0
                  ):
+        # Counts coefficient assignments, so cached results can tell that they are stale
+        self.coefficient_revision = 0
+
         PureLateral.__init__(self,
                              a0=a0,
                  a1=a1,
@@ -125,11 +140,17 @@ class Pacejka94(TireModelBase, PureLateral, PureLongitudinal, AligningMoment):
         self.Name = 'Pacejka94'
         self.Description = 'An implementation of Pacejka 94'
 
+    def __setattr__(self, name, value):
+        if name in _COEFFICIENT_SET:
+            object.__setattr__(self, 'coefficient_revision', self.coefficient_revision + 1)
+
+        object.__setattr__(self, name, value)
+
     def get_model_info(self):
         pass
 
     def get_parameters(self):
-        pass
+        return dict((name, getattr(self, name)) for name in COEFFICIENT_NAMES)
 
     def load(self, fname):
         pass
@@ -138,43 +159,90 @@ class Pacejka94(TireModelBase, PureLateral, PureLongitudinal, AligningMoment):
         pass
 
     def set_parameters(self, params):
-        pass
+        # Reject the whole set if any key isn't one of the model coefficients
+        for name in params:
+            if name not in COEFFICIENT_NAMES:
+                return False
+
+        for name in params:
+            setattr(self, name, params[name])
+
+        return True
+
+    def get_parameter_vector(self):
+        """Return all coefficients as a float array, ordered as COEFFICIENT_NAMES"""
+        return np.array([getattr(self, name) for name in COEFFICIENT_NAMES], dtype=float)
+
+    def set_parameter_vector(self, vector):
+        """Set all coefficients from an array ordered as COEFFICIENT_NAMES"""
+        # All coefficients at once, counted as a single change
+        self.__dict__.update(zip(COEFFICIENT_NAMES, np.asarray(vector, dtype=float).tolist()))
+        self.coefficient_revision += 1
+
+    def calculate_parameter_jacobian(self, state, mode=SolverMode.All, parameters=COEFFICIENT_NAMES):
+        """Outputs in mode and their partial derivatives with respect to the coefficients in parameters.
+
+        Returns a TireStateBatch with the outputs and a dictionary of output name to a (points, len(parameters))
+        array, see PAC2002.calculate_parameter_jacobian. The equations are evaluated once on a copy of the model
+        whose coefficients are Dual numbers.
+        """
+        batch, shape = TireStateBatch.from_state(state)
+        point = TireState(**batch.columns())
+
+        model = copy.copy(self)
+        for name in parameters:
+            setattr(model, name, Dual.seed(float(getattr(self, name)), name))
+
+        model.solve_batch(point, mode)
+
+        jacobian = dict()
+        for field in TireStateBatch.FIELDS:
+            value = getattr(point, field)
+            if isinstance(value, Dual):
+                setattr(batch, field, value.value)
+                jacobian[field] = gradient_matrix(value, parameters, len(batch))
+            else:
+                setattr(batch, field, value)
+
+        return batch, jacobian
+
+    def solve(self, input_state, mode=SolverMode.All, chunk_size=DEFAULT_CHUNK_SIZE, output='batch'):
+        """Solve the grid of operating points described by input_state, see TireStateBatch.to_format for output"""
+
+        # The input lists describe a full grid of operating points, slip angle varying fastest.
+        # The grid is expanded chunk by chunk straight into the preallocated result batch, so the
+        # intermediate arrays of the equations never exceed chunk_size points.
+        grid = SweepGrid.from_state(input_state, self.GRID_AXES)
+        states = TireStateBatch.empty(len(grid), output)
+
+        for start, stop in grid.chunk_bounds(chunk_size):
+            self.solve_batch(grid.expand(start, stop, out=states[start:stop]), mode)
+
+        return states.to_format(output)
+
+    def solve_chunks(self, input_state, mode=SolverMode.All, chunk_size=DEFAULT_CHUNK_SIZE, output='batch'):
+        """Streaming version of solve, yielding one result per chunk of the grid as soon as it is computed.
+
+        Chunks are yielded in grid order, DataFrame chunks are indexed by their row numbers in the full grid. Only
+        one chunk is held in memory at a time.
+        """
+        grid = SweepGrid.from_state(input_state, self.GRID_AXES)
+
+        for start, stop in grid.chunk_bounds(chunk_size):
+            state = self.solve_batch(grid.expand(start, stop, out=TireStateBatch.empty(stop - start, output)), mode)
+            yield state.to_format(output, index=range(start, stop))
+
+    def solve_batch(self, state, mode=SolverMode.All):
+        # Evaluates the requested outputs for a state (scalar TireState or TireStateBatch) in place.
+        # Pacejka 94 has no combined slip equations, so the combined modes use the pure equations.
+
+        if mode & (SolverMode.PureFy | SolverMode.Fy):
+            state.FY = self.calculate_pure_fy(state)
+
+        if mode & (SolverMode.PureFx | SolverMode.Fx):
+            state.FX = self.calculate_pure_fx(state)
+
+        if mode & (SolverMode.PureMz | SolverMode.Mz):
+            state.MZ = self.calculate_pure_mz(state)
 
-    def solve(self, input_state, mode=SolverMode.All):
-        state = TireState()
-        states = TireState(FX=[], FY=[], FZ=[], MX=[], MY=[], MZ=[], SA=[], SR=[], IA=[], V=[], P=[])
-        state_table = TireState(FX=[], FY=[], FZ=[], MX=[], MY=[], MZ=[], SA=[], SR=[], IA=[], V=[], P=[])
-        state_table.FZ = input_state.FZ * len(input_state.SA) * len(input_state.SR)
-        state_table.IA = input_state.IA * len(input_state.SA) * len(input_state.SR)
-        state_table.SA = input_state.SA * len(input_state.SR)
-        state_table.SR = len(input_state.SA) * input_state.SR
-
-
-        for fz, ia, sr, sa in zip(state_table.FZ, state_table.IA, state_table.SR, state_table.SA):
-            state.FZ = fz
-            state.IA = ia
-            state.SR = sr
-            state.SA = sa
-
-            if mode is SolverMode.PureFy or mode is SolverMode.All:
-                state.FY = self.calculate_pure_fy(state)
-
-            if mode is SolverMode.PureFx or mode is SolverMode.All:
-                state.FX = self.calculate_pure_fx(state)
-
-            if mode is SolverMode.PureMz or mode is SolverMode.All:
-                state.MZ = self.calculate_pure_mz(state)
-
-            states.FX.append(state.FX)
-            states.FY.append(state.FY)
-            states.FZ.append(state.FZ)
-            states.MX.append(state.MX)
-            states.MY.append(state.MY)
-            states.MZ.append(state.MZ)
-            states.SA.append(state.SA)
-            states.SR.append(state.SR)
-            states.IA.append(state.IA)
-            states.V.append(state.V)
-            states.P.append(state.P)
-
-        return states
+        return state
@@ -1,5 +1,4 @@
-from copy import deepcopy
-from math import sin, atan, copysign, exp
+import numpy as np
 
 
 class AligningMoment():
@@ -53,42 +52,43 @@ class AligningMoment():
     def __calculate_C(self):
         return self.c0
 
-    def __calculate_BCD(self, state):
-        return (self.c3 * state.FZ * state.FZ + self.c4*state.FZ) * (1 - self.c6*abs(state.IA)) * exp(-self.c5 * state.FZ)
+    def __calculate_BCD(self, fz, ia):
+        return (self.c3 * fz * fz + self.c4*fz) * (1 - self.c6*np.abs(ia)) * np.exp(-self.c5 * fz)
 
-    def __calculate_D(self, state):
-        return state.FZ * (self.c1 * state.FZ + self.c2) * (1 - self.c18 * state.IA * state.IA)
+    def __calculate_D(self, fz, ia):
+        return fz * (self.c1 * fz + self.c2) * (1 - self.c18 * ia * ia)
 
     def __calculate_B(self, BCD, C, D):
         return BCD / (C * D)
 
-    def __calculate_H(self, state):
-        return self.c11 * state.IA + self.c12 + self.c13 * state.IA
+    def __calculate_H(self, ia):
+        return self.c11 * ia + self.c12 + self.c13 * ia
 
-    def __calculate_E(self, state, H):
-        return ((self.c7 * state.FZ * state.FZ + self.c8 * state.FZ + self.c9) * (1 - ((self.c19 * state.IA + self.c20) * copysign(1, state.SA + H)))) / (1 - self.c10 * abs(state.IA))
+    def __calculate_E(self, fz, ia, sa, H):
+        return ((self.c7 * fz * fz + self.c8 * fz + self.c9) * (1 - ((self.c19 * ia + self.c20) * np.copysign(1, sa + H)))) / (1 - self.c10 * np.abs(ia))
 
 
-    def __calculate_V(self, state):
-        return self.c14 * state.FZ + self.c15 + (self.c16 * state.FZ + self.c17) * state.IA * state.FZ
+    def __calculate_V(self, fz, ia):
+        return self.c14 * fz + self.c15 + (self.c16 * fz + self.c17) * ia * fz
 
-    def __calculate_Bx1(self, state, B, H):
-        return B * (state.SA + H)
+    def __calculate_Bx1(self, sa, B, H):
+        return B * (sa + H)
 
 
     def calculate_pure_mz(self, state):
-        copy_state = deepcopy(state)
-        copy_state.FZ = copy_state.FZ/1000
-        copy_state.SA = copy_state.SA*3.14/180
+        # Unit conversions are done on local columns, the state itself is never copied or modified
+        fz = state.FZ/1000
+        ia = state.IA
+        sa = state.SA*3.14/180
         C = self.__calculate_C()
-        BCD = self.__calculate_BCD(copy_state)
-        D = self.__calculate_D(copy_state)
+        BCD = self.__calculate_BCD(fz, ia)
+        D = self.__calculate_D(fz, ia)
         B = self.__calculate_B(BCD, C, D)
-        H = self.__calculate_H(copy_state)
-        E = self.__calculate_E(copy_state, H)
-        V = self.__calculate_V(copy_state)
-        Bx1 = self.__calculate_Bx1(copy_state, B, H)
+        H = self.__calculate_H(ia)
+        E = self.__calculate_E(fz, ia, sa, H)
+        V = self.__calculate_V(fz, ia)
+        Bx1 = self.__calculate_Bx1(sa, B, H)
 
-        F = D * sin(C * atan(Bx1 - E * (Bx1 - atan(Bx1)))) + V
+        F = D * np.sin(C * np.arctan(Bx1 - E * (Bx1 - np.arctan(Bx1)))) + V
 
         return F
@@ -1,5 +1,6 @@
-from copy import deepcopy
-from math import sin, atan, copysign
+import numpy as np
+
+from ..magicformula import magic_formula_slope
 
 
 class PureLateral():
@@ -46,48 +47,61 @@ class PureLateral():
     def __calculate_C(self):
         return self.a0
 
-    def __calculate_BCD(self, state):
-        BCD = self.a3 * sin(atan((state.FZ) / self.a4) * 2) * (1 - self.a5 * abs(state.IA))
+    def __calculate_BCD(self, fz, ia):
+        BCD = self.a3 * np.sin(np.arctan(fz / self.a4) * 2) * (1 - self.a5 * np.abs(ia))
         return BCD
 
-    def __calculate_D(self, state):
-        return state.FZ * (self.a1 * state.FZ + self.a2) * (1 - self.a15 * state.IA * state.IA)
+    def __calculate_D(self, fz, ia):
+        return fz * (self.a1 * fz + self.a2) * (1 - self.a15 * ia * ia)
 
     def __calculate_B(self, BCD, C, D):
         B = BCD / (C * D)
         return B
 
-    def __calculate_H(self, state):
-        H = self.a8 * state.FZ + self.a9 + self.a10 * state.IA
+    def __calculate_H(self, fz, ia):
+        H = self.a8 * fz + self.a9 + self.a10 * ia
         return H
 
-    def __calculate_E(self, state, H):
-        E = (self.a6 * state.FZ + self.a7) * (1 - (self.a16 * state.IA + self.a17)) * copysign(1, state.SA + H)
+    def __calculate_E(self, fz, ia, sa, H):
+        E = (self.a6 * fz + self.a7) * (1 - (self.a16 * ia + self.a17)) * np.copysign(1, sa + H)
         return E
 
-    def __calculate_V(self, state):
-        V = self.a11 * state.FZ + self.a12 + (self.a13 * state.FZ + self.a14) * state.IA * state.FZ
+    def __calculate_V(self, fz, ia):
+        V = self.a11 * fz + self.a12 + (self.a13 * fz + self.a14) * ia * fz
         return V
 
-    def __calculate_Bx1(self, state, B, H):
-        Bx1 = B * (state.SA + H)
+    def __calculate_Bx1(self, sa, B, H):
+        Bx1 = B * (sa + H)
         return Bx1
 
 
-    def calculate_pure_fy(self, state):
-        copy_state = deepcopy(state)
-        copy_state.FZ = copy_state.FZ
-        copy_state.SR = copy_state.SR*100
-        copy_state.SA = copy_state.SA
+    def __calculate_factors(self, fz, ia, sa):
         C = self.__calculate_C()
-        BCD = self.__calculate_BCD(copy_state)
-        D = self.__calculate_D(copy_state)
+        BCD = self.__calculate_BCD(fz, ia)
+        D = self.__calculate_D(fz, ia)
         B = self.__calculate_B(BCD, C, D)
-        H = self.__calculate_H(copy_state)
-        E = self.__calculate_E(copy_state, H)
-        V = self.__calculate_V(copy_state)
-        Bx1 = self.__calculate_Bx1(copy_state, B, H)
+        H = self.__calculate_H(fz, ia)
+        E = self.__calculate_E(fz, ia, sa, H)
+        V = self.__calculate_V(fz, ia)
+
+        return B, C, D, E, H, V
+
+    def calculate_pure_fy(self, state):
+        # The state columns are read directly (scalars or arrays), the state itself is never copied or modified
+        sa = state.SA
 
-        F = D * sin(C * atan(Bx1 - E * (Bx1 - atan(Bx1)))) + V
+        B, C, D, E, H, V = self.__calculate_factors(state.FZ, state.IA, sa)
+        Bx1 = self.__calculate_Bx1(sa, B, H)
+
+        F = D * np.sin(C * np.arctan(Bx1 - E * (Bx1 - np.arctan(Bx1)))) + V
 
         return F
+
+    def calculate_pure_fy_derivative(self, state):
+        """Partial derivative of the pure lateral force with respect to the slip angle SA"""
+        sa = state.SA
+
+        # E only depends on the sign of SA + H, so the slope is the Magic Formula slope at SA + H
+        B, C, D, E, H, V = self.__calculate_factors(state.FZ, state.IA, sa)
+
+        return magic_formula_slope(B, C, D, E, sa + H)
@@ -1,5 +1,6 @@
-from copy import deepcopy
-from math import sin, atan, copysign, exp
+import numpy as np
+
+from ..magicformula import magic_formula_slope
 
 
 class PureLongitudinal():
@@ -38,43 +39,58 @@ class PureLongitudinal():
     def __calculate_C(self):
         return self.b0
 
-    def __calculate_BCD(self, state):
-        return (self.b3 * state.FZ * state.FZ + self.b4*state.FZ) * exp(-self.b5 * state.FZ)
+    def __calculate_BCD(self, fz):
+        return (self.b3 * fz * fz + self.b4*fz) * np.exp(-self.b5 * fz)
 
-    def __calculate_D(self, state):
-        return state.FZ * (self.b1 * state.FZ + self.b2)
+    def __calculate_D(self, fz):
+        return fz * (self.b1 * fz + self.b2)
 
     def __calculate_B(self, BCD, C, D):
         B = BCD / (C * D)
         return B
 
-    def __calculate_H(self, state):
-        return self.b9 * state.FZ + self.b10
-
-    def __calculate_E(self, state, H):
-        return (self.b6 * state.FZ * state.FZ + self.b7 * state.FZ + self.b8) * (1 - self.b13 * copysign(1, state.SR + H))
+    def __calculate_H(self, fz):
+        return self.b9 * fz + self.b10
 
-    def __calculate_V(self, state):
-        return self.b11 * state.FZ + self.b12
+    def __calculate_E(self, fz, sr, H):
+        return (self.b6 * fz * fz + self.b7 * fz + self.b8) * (1 - self.b13 * np.copysign(1, sr + H))
 
-    def __calculate_Bx1(self, state, B, H):
-        return B * (state.SR + H)
+    def __calculate_V(self, fz):
+        return self.b11 * fz + self.b12
 
+    def __calculate_Bx1(self, sr, B, H):
+        return B * (sr + H)
 
-    def calculate_pure_fx(self, state):
-        copy_state = deepcopy(state)
-        copy_state.FZ = copy_state.FZ/1000
-        copy_state.SR = copy_state.SR*100
 
+    def __calculate_factors(self, fz, sr):
         C = self.__calculate_C()
-        BCD = self.__calculate_BCD(copy_state)
-        D = self.__calculate_D(copy_state)
+        BCD = self.__calculate_BCD(fz)
+        D = self.__calculate_D(fz)
         B = self.__calculate_B(BCD, C, D)
-        H = self.__calculate_H(copy_state)
-        E = self.__calculate_E(copy_state, H)
-        V = self.__calculate_V(copy_state)
-        Bx1 = self.__calculate_Bx1(copy_state, B, H)
+        H = self.__calculate_H(fz)
+        E = self.__calculate_E(fz, sr, H)
+        V = self.__calculate_V(fz)
+
+        return B, C, D, E, H, V
+
+    def calculate_pure_fx(self, state):
+        # Unit conversions are done on local columns, the state itself is never copied or modified
+        fz = state.FZ/1000
+        sr = state.SR*100
+
+        B, C, D, E, H, V = self.__calculate_factors(fz, sr)
+        Bx1 = self.__calculate_Bx1(sr, B, H)
 
-        F = D * sin(C * atan(Bx1 - E * (Bx1 - atan(Bx1)))) + V
+        F = D * np.sin(C * np.arctan(Bx1 - E * (Bx1 - np.arctan(Bx1)))) + V
 
         return F
+
+    def calculate_pure_fx_derivative(self, state):
+        """Partial derivative of the pure longitudinal force with respect to the slip ratio SR"""
+        fz = state.FZ/1000
+        sr = state.SR*100
+
+        # E only depends on the sign of sr + H, the factor 100 is the slip ratio to percent conversion
+        B, C, D, E, H, V = self.__calculate_factors(fz, sr)
+
+        return magic_formula_slope(B, C, D, E, sr + H) * 100
@@ -1,3 +1,4 @@
 __author__ = 'henningo'
 
 from .PAC2002 import PAC2002
+from .coefficients import CompiledCoefficients, COEFFICIENT_NAMES
@@ -0,0 +1,98 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+# All PAC2002 model coefficients, in the order they are stored in the parameter vector
+COEFFICIENT_NAMES = (
+    # General Coefficients
+    'FNOMIN', 'UNLOADED_RADIUS', 'LONGVL',
+    # General Scaling Factors
+    'LFZ0', 'LCZ',
+    # Pure Longitudinal Scaling Factors
+    'LCX', 'LMUX', 'LEX', 'LKX', 'LHX', 'LVX', 'LGAX',
+    # Pure Lateral Scaling Factors
+    'LCY', 'LMUY', 'LEY', 'LKY', 'LHY', 'LVY', 'LGAY',
+    # Pure Aligning Moment Scaling Factors
+    'LTR', 'LRES', 'LGAZ',
+    # Combined Scaling Factors
+    'LXAL', 'LYKA', 'LVYKA', 'LS',
+    # Overturning Scaling Factors
+    'LMX', 'LVMX',
+    # Rolling Resistance Factors
+    'LMY',
+    # Relaxation Scaling Factors
+    'LSGKP', 'LSGAL',
+    # Pure Lateral Coefficients
+    'PCY1', 'PDY1', 'PDY2', 'PDY3', 'PEY1', 'PEY2', 'PEY3', 'PEY4', 'PKY1', 'PKY2', 'PKY3', 'PHY1', 'PHY2', 'PHY3',
+    'PVY1', 'PVY2', 'PVY3', 'PVY4',
+    # Combined Lateral Coefficients
+    'RBY1', 'RBY2', 'RBY3', 'RCY1', 'REY1', 'REY2', 'RHY1', 'RHY2', 'RVY1', 'RVY2', 'RVY3', 'RVY4', 'RVY5', 'RVY6',
+    # Pure Aligning Torque Coefficients
+    'QBZ1', 'QBZ2', 'QBZ3', 'QBZ4', 'QBZ5', 'QBZ9', 'QBZ10', 'QCZ1', 'QDZ1', 'QDZ2', 'QDZ3', 'QDZ4', 'QDZ6', 'QDZ7',
+    'QDZ8', 'QDZ9', 'QEZ1', 'QEZ2', 'QEZ3', 'QEZ4', 'QEZ5', 'QHZ1', 'QHZ2', 'QHZ3', 'QHZ4',
+    # Combined Aligning Coefficients
+    'SSZ1', 'SSZ2', 'SSZ3', 'SSZ4',
+    # Pure longitudinal coefficients
+    'PCX1', 'PDX1', 'PDX2', 'PDX3', 'PEX1', 'PEX2', 'PEX3', 'PEX4', 'PKX1', 'PKX2', 'PKX3', 'PHX1', 'PHX2', 'PVX1',
+    'PVX2',
+    # Combined longitudinal coefficients
+    'RBX1', 'RBX2', 'RCX1', 'REX1', 'REX2', 'RHX1',
+    # Overturning Moment Coefficients
+    'QSX1', 'QSX2', 'QSX3',
+    # Rolling Resistance Coefficients
+    'QSY1', 'QSY2', 'QSY3', 'QSY4',
+    # Loaded Radius
+    'QV1', 'QV2', 'QFCX', 'QFCY', 'QFCG', 'QFZ1', 'QFZ2',
+    # Rolling Radius
+    'BREFF', 'DREFF', 'FREFF',
+    # Lateral Relaxation
+    'PTY1', 'PTY2',
+    # Longitudinal Relaxation
+    'PTX1', 'PTX2', 'PTX3',
+    # Turn-slip reduction factors (turn slip isn't implemented, so these are all 1)
+    'ZETA0', 'ZETA1', 'ZETA2', 'ZETA3', 'ZETA4', 'ZETA5', 'ZETA6', 'ZETA7', 'ZETA8',
+)
+
+# Position of every coefficient in the parameter vector
+COEFFICIENT_INDEX = dict((name, index) for index, name in enumerate(COEFFICIENT_NAMES))
+
+# Load independent products that are folded once when the coefficients are compiled
+DERIVED_NAMES = ('C_x', 'C_y', 'C_t', 'K_y0_SCALE', 'K_y_DENOM', 'FZ0_SCALED', 'R0_FNOMIN', 'LKY_LMUY', 'C_z0')
+
+
+class CompiledCoefficients(object):
+    """Read-only snapshot of the PAC2002 coefficients used by the equations.
+
+    vector holds the coefficients contiguously in COEFFICIENT_NAMES order and every coefficient is also exposed as
+    a slot attribute. The load independent products (DERIVED_NAMES) are computed once here instead of on every
+    evaluation. The snapshot must be rebuilt whenever a coefficient changes, PAC2002 takes care of that.
+    """
+
+    __slots__ = ('vector',) + COEFFICIENT_NAMES + DERIVED_NAMES
+
+    def __init__(self, vector):
+        self.vector = vector
+
+        # A single coefficient set is unpacked into Python floats, which are faster than NumPy scalars in the equations
+        values = vector.tolist() if vector.ndim == 1 else vector
+        for name, value in zip(COEFFICIENT_NAMES, values):
+            setattr(self, name, value)
+
+        # 21, 33, 51
+        self.C_x = self.PCX1 * self.LCX
+        self.C_y = self.PCY1 * self.LCY
+        self.C_t = self.QCZ1
+
+        # 37
+        self.K_y0_SCALE = self.PKY1 * self.FNOMIN * self.LFZ0 * self.LKY
+        self.K_y_DENOM = self.PKY2 * self.FNOMIN * self.LFZ0
+        if np.any(self.K_y_DENOM == 0.0):
+            print('Division by zero detected in K_Y calculation')
+            self.K_y_DENOM = np.where(self.K_y_DENOM == 0.0, 0.000000001, self.K_y_DENOM)
+
+        self.FZ0_SCALED = self.FNOMIN * self.LFZ0
+        self.R0_FNOMIN = self.UNLOADED_RADIUS / self.FNOMIN
+        self.LKY_LMUY = self.LKY / self.LMUY
+
+        # Nominal vertical stiffness
+        self.C_z0 = self.FNOMIN / self.UNLOADED_RADIUS * (self.QFZ1**2 + 4.0 * self.QFZ2)**0.5
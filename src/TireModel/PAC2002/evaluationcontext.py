@@ -0,0 +1,28 @@
+__author__ = 'henningo'
+
+
+class EvaluationContext(object):
+    """Intermediate values shared between all outputs of one operating point (or TireStateBatch).
+
+    Values are computed on first access, by the resolver registered for that name in model.INTERMEDIATES, and
+    then stored on the context. Every intermediate is therefore computed at most once, however many outputs
+    use it. A context is only valid for the state (and coefficients) it was created for. The coefficients default to
+    the compiled snapshot of the model, another CompiledCoefficients can be passed to evaluate the model with them.
+    """
+
+    def __init__(self, model, state, coefficients=None):
+        self.model = model
+        self.state = state
+        self.p = model.compiled if coefficients is None else coefficients
+
+    def __getattr__(self, name):
+        # Only called when the value hasn't been computed yet
+        try:
+            resolve = self.model.INTERMEDIATES[name]
+        except KeyError:
+            raise AttributeError(name)
+
+        value = resolve(self.model, self)
+        setattr(self, name, value)
+
+        return value
@@ -4,3 +4,12 @@ from .PAC2002 import PAC2002
 from .tiremodelbase import TireModelBase
 from .solvermode import SolverMode
 from .P94.P94 import Pacejka94
+from .parallelsweep import ParallelSweep
+from .inversesolver import InverseSolver
+from .lookuptable import LookupTableModel
+from .evaluationcache import EvaluationCache
+from .transientsimulation import TransientSimulation
+from .vehiclesolver import VehicleSolver, QuasiStaticVehicle
+from .frictionenvelope import FrictionEnvelope
+from .characteristics import CharacteristicsSolver, TireCharacteristics
+from .sweepstore import SweepStore
@@ -0,0 +1,62 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..Core import TireState
+
+
+class TireCharacteristics(object):
+    """Characteristic values of the pure lateral behaviour of a tire, every field is an array of the load case shape.
+
+    FY_PEAK and SA_PEAK are the peak lateral force and its slip angle for positive slip angles (V > 0),
+    FY_PEAK_NEGATIVE and SA_PEAK_NEGATIVE the same for negative slip angles. CORNERING_STIFFNESS is K_y and
+    PNEUMATIC_TRAIL the pneumatic trail at zero slip angle.
+    """
+    __slots__ = ('FZ', 'IA', 'V', 'P', 'FY_PEAK', 'SA_PEAK', 'FY_PEAK_NEGATIVE', 'SA_PEAK_NEGATIVE',
+                 'CORNERING_STIFFNESS', 'PNEUMATIC_TRAIL')
+
+
+class CharacteristicsSolver(object):
+    """Peak force, slip at peak, cornering stiffness and pneumatic trail of a PAC2002 model for many load cases.
+
+    Nothing is swept: the values come from the Magic Formula factors of the model (D_y, K_y, B_t, ...) evaluated
+    once per load case, see PAC2002.calculate_peak_fy. Only the slip angle at the peak needs an iterative solve,
+    which runs vectorized over all load cases.
+
+    coefficients, a (tires, coefficients) array, evaluates every load case for several tires at once, the fields of
+    the result then get a leading tires axis. Without it the coefficients of the model are used.
+    """
+
+    def __init__(self, model, coefficients=None, tolerance=1e-12, max_iterations=20):
+        self.model = model
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.__compiled = None if coefficients is None else model.compile_coefficient_sets(coefficients)
+
+    def solve(self, FZ, IA=0.0, V=16.6, P=0.0):
+        """Characteristics (a TireCharacteristics) of every load case, FZ, IA, V and P are broadcast together"""
+        FZ, IA, V, P = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in (FZ, IA, V, P)])
+        shape = FZ.shape
+
+        # All values are taken at zero slip, the flat load cases broadcast against the tire axis of coefficients
+        state = TireState(FZ=FZ.ravel(), IA=IA.ravel(), V=V.ravel(), P=P.ravel(), SA=0.0, SR=0.0)
+        ctx = self.model.create_context(state, self.__compiled)
+
+        result = TireCharacteristics()
+        result.FZ, result.IA, result.V, result.P = FZ, IA, V, P
+
+        result.FY_PEAK, result.SA_PEAK = self.model.calculate_peak_fy(state, ctx, 1.0, self.tolerance,
+                                                                      self.max_iterations)
+        result.FY_PEAK_NEGATIVE, result.SA_PEAK_NEGATIVE = self.model.calculate_peak_fy(
+            state, ctx, -1.0, self.tolerance, self.max_iterations)
+        result.CORNERING_STIFFNESS = self.model.calculate_cornering_stiffness(state, ctx)
+        result.PNEUMATIC_TRAIL = self.model.calculate_pneumatic_trail(state, ctx)
+
+        # Back to the load case shape, behind the tire axis if there is one
+        tires = () if self.__compiled is None else (self.__compiled.vector.shape[1],)
+        for name in ('FY_PEAK', 'SA_PEAK', 'FY_PEAK_NEGATIVE', 'SA_PEAK_NEGATIVE', 'CORNERING_STIFFNESS',
+                     'PNEUMATIC_TRAIL'):
+            value = np.broadcast_to(getattr(result, name), tires + (FZ.size,))
+            setattr(result, name, value.reshape(tires + shape))
+
+        return result
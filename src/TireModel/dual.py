@@ -0,0 +1,182 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+
+class Dual(object):
+    """Forward mode automatic differentiation value: a value together with its partial derivatives.
+
+    value is a float or an array, gradient is a dictionary of seed variable to the derivative with respect to it
+    (broadcastable to value). Variables the value doesn't depend on are left out, so every operation only carries
+    the derivatives that are actually non-zero. Arithmetic and the NumPy functions used in the model equations apply
+    the chain rule, so evaluating the unchanged equations on Dual inputs gives exact partial derivatives of every
+    output in one vectorized pass. Comparisons and np.sign act on the value only.
+    """
+
+    __slots__ = ('value', 'gradient')
+
+    def __init__(self, value, gradient):
+        self.value = value
+        self.gradient = gradient
+
+    @classmethod
+    def seed(cls, value, key):
+        """Independent variable with the given value, differentiated with respect to under key"""
+        return cls(value, {key: 1.0})
+
+    def derivative(self, key):
+        """Derivative with respect to the seed key, broadcast to the shape of the value"""
+        return np.broadcast_to(self.gradient.get(key, 0.0), np.shape(self.value))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+
+        values = [x.value if isinstance(x, Dual) else x for x in inputs]
+        result = ufunc(*values)
+
+        if ufunc in _CONSTANT:
+            return result
+
+        try:
+            partials = _PARTIALS[ufunc]
+        except KeyError:
+            return NotImplemented
+
+        # Chain rule, summed over the inputs that carry a gradient
+        gradient = dict()
+        for x, partial in zip(inputs, partials):
+            if not isinstance(x, Dual):
+                continue
+
+            factor = partial(result, *values)
+            for key, derivative in x.gradient.items():
+                # Derivatives are never modified in place, so a unit factor can share the array
+                term = derivative if factor is _ONE else derivative * factor
+                gradient[key] = gradient[key] + term if key in gradient else term
+
+        return Dual(result, gradient)
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func is not np.where or kwargs or len(args) != 3:
+            return NotImplemented
+
+        condition, x, y = args
+        gradient_x = x.gradient if isinstance(x, Dual) else dict()
+        gradient_y = y.gradient if isinstance(y, Dual) else dict()
+
+        gradient = dict()
+        for key in set(gradient_x) | set(gradient_y):
+            gradient[key] = np.where(condition, gradient_x.get(key, 0.0), gradient_y.get(key, 0.0))
+
+        return Dual(np.where(condition, _value(x), _value(y)), gradient)
+
+    def __add__(self, other):
+        return np.add(self, other)
+
+    def __radd__(self, other):
+        return np.add(other, self)
+
+    def __sub__(self, other):
+        return np.subtract(self, other)
+
+    def __rsub__(self, other):
+        return np.subtract(other, self)
+
+    def __mul__(self, other):
+        return np.multiply(self, other)
+
+    def __rmul__(self, other):
+        return np.multiply(other, self)
+
+    def __truediv__(self, other):
+        return np.true_divide(self, other)
+
+    def __rtruediv__(self, other):
+        return np.true_divide(other, self)
+
+    def __pow__(self, other):
+        return np.power(self, other)
+
+    def __rpow__(self, other):
+        return np.power(other, self)
+
+    def __neg__(self):
+        return np.negative(self)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return np.absolute(self)
+
+    def __eq__(self, other):
+        return np.equal(self, other)
+
+    def __ne__(self, other):
+        return np.not_equal(self, other)
+
+    def __lt__(self, other):
+        return np.less(self, other)
+
+    def __le__(self, other):
+        return np.less_equal(self, other)
+
+    def __gt__(self, other):
+        return np.greater(self, other)
+
+    def __ge__(self, other):
+        return np.greater_equal(self, other)
+
+    __hash__ = None
+
+
+def _value(x):
+    return x.value if isinstance(x, Dual) else x
+
+
+def gradient_matrix(value, keys, size):
+    """(size, len(keys)) array of the derivatives of value with respect to keys, zero where value isn't a Dual"""
+    matrix = np.zeros((size, len(keys)))
+
+    if isinstance(value, Dual):
+        for column, key in enumerate(keys):
+            matrix[:, column] = value.derivative(key)
+
+    return matrix
+
+
+# Functions of the value only, their derivative is zero wherever it exists
+_CONSTANT = frozenset([np.sign, np.equal, np.not_equal, np.less, np.less_equal, np.greater, np.greater_equal,
+                       np.isfinite, np.isnan])
+
+_ONE = 1.0
+
+
+def _sqrt_partial(r):
+    # 0.5 / r, zero where the root is zero. The argument is a sum of squares there (e.g. at zero slip), whose own
+    # derivative is zero as well, and 0.5 / r would turn it into NaN.
+    with np.errstate(divide='ignore'):
+        return np.where(r == 0.0, 0.0, 0.5 / r)
+
+# Partial derivative with respect to each input, as a function of the result and the input values
+_PARTIALS = {
+    np.add: (lambda r, a, b: _ONE, lambda r, a, b: _ONE),
+    np.subtract: (lambda r, a, b: _ONE, lambda r, a, b: -1.0),
+    np.multiply: (lambda r, a, b: b, lambda r, a, b: a),
+    np.true_divide: (lambda r, a, b: 1.0 / b, lambda r, a, b: -r / b),
+    np.power: (lambda r, a, b: b * a ** (b - 1.0), lambda r, a, b: r * np.log(a)),
+    np.minimum: (lambda r, a, b: 1.0 * (a <= b), lambda r, a, b: 1.0 * (a > b)),
+    np.maximum: (lambda r, a, b: 1.0 * (a >= b), lambda r, a, b: 1.0 * (a < b)),
+    np.copysign: (lambda r, a, b: np.sign(a) * np.sign(r), lambda r, a, b: 0.0),
+    np.negative: (lambda r, a: -1.0,),
+    np.absolute: (lambda r, a: np.sign(a),),
+    np.square: (lambda r, a: 2.0 * a,),
+    np.sqrt: (lambda r, a: _sqrt_partial(r),),
+    np.exp: (lambda r, a: r,),
+    np.log: (lambda r, a: 1.0 / a,),
+    np.sin: (lambda r, a: np.cos(a),),
+    np.cos: (lambda r, a: -np.sin(a),),
+    np.tan: (lambda r, a: 1.0 + r * r,),
+    np.arctan: (lambda r, a: 1.0 / (1.0 + a * a),),
+}
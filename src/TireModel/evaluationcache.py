@@ -0,0 +1,136 @@
+__author__ = 'henningo'
+
+from collections import OrderedDict
+
+import numpy as np
+
+from ..Core import TireStateBatch, SweepGrid
+from ..Core.sweepgrid import DEFAULT_CHUNK_SIZE
+from .solvermode import SolverMode
+
+# Inputs that make up the cache key, and the default quantization step of each
+KEY_FIELDS = ('SA', 'SR', 'FZ', 'IA', 'V', 'P')
+DEFAULT_RESOLUTION = {'SA': 1e-6, 'SR': 1e-6, 'FZ': 1e-2, 'IA': 1e-6, 'V': 1e-3, 'P': 1.0}
+
+
+class EvaluationCache(object):
+    """Memoizing cache of model results, used in place of the model (solve_batch / solve).
+
+    Every input in KEY_FIELDS is rounded to a multiple of its resolution, and the rounded inputs together with the
+    solver mode are the key of a point. A point that falls into the same cell as an earlier one gets the outputs
+    computed for the earlier point. As with the model, the fields of every output the mode needs (e.g. FY and FX for
+    Mz) are stored and written. Points with a non-finite input have no cell, they are passed on to the model and
+    never cached. At most size results are kept, the least recently used one is evicted first.
+
+    The cache empties itself when a coefficient of the model is changed, which the models report through their
+    coefficient_revision counter. hits, misses, evictions and invalidations count what happened so far.
+    """
+
+    def __init__(self, model, size=65536, resolution=None):
+        self.model = model
+        self.size = size
+        self.resolution = dict(DEFAULT_RESOLUTION, **(resolution or {}))
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self.__scale = np.array([1.0 / self.resolution[name] for name in KEY_FIELDS])
+        self.__key = np.dtype((np.void, 8 * (len(KEY_FIELDS) + 1)))
+        self.__fields = dict()
+        self.__entries = OrderedDict()
+        self.__revision = getattr(model, 'coefficient_revision', 0)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Drop all cached results, the counters are kept"""
+        self.__entries.clear()
+
+    def solve(self, input_state, mode=SolverMode.All, chunk_size=DEFAULT_CHUNK_SIZE):
+
+        # Same grid convention as the model, slip angle varying fastest
+        grid = SweepGrid.from_state(input_state, self.model.GRID_AXES)
+        states = TireStateBatch(len(grid))
+
+        for start, stop in grid.chunk_bounds(chunk_size):
+            self.solve_batch(grid.expand(start, stop, out=states[start:stop]), mode)
+
+        return states
+
+    def solve_batch(self, state, mode=SolverMode.All):
+        # Writes the outputs of mode into the state (scalar TireState or TireStateBatch) in place, only the points
+        # that aren't cached are passed on to the model
+        mode = SolverMode(mode)
+        fields = self.__fields.get(mode)
+        if fields is None:
+            fields = self.__fields[mode] = SolverMode(sum(mode.schedule())).fields()
+
+        revision = getattr(self.model, 'coefficient_revision', 0)
+        if revision != self.__revision:
+            self.__entries.clear()
+            self.__revision = revision
+            self.invalidations += 1
+
+        columns = np.broadcast_arrays(*[np.asarray(getattr(state, name), dtype=float) for name in KEY_FIELDS])
+        shape = columns[0].shape
+        inputs = np.array(columns).reshape(len(KEY_FIELDS), -1).T
+        finite = np.isfinite(inputs).all(axis=1)
+        all_finite = finite.all()
+        if not all_finite:
+            inputs = np.where(finite[:, np.newaxis], inputs, 0.0)
+
+        # The key of a point is the bytes of its quantized inputs and the mode, built for all points at once
+        quantized = np.empty((len(inputs), len(KEY_FIELDS) + 1), dtype=np.int64)
+        quantized[:, :-1] = np.rint(inputs * self.__scale)
+        quantized[:, -1] = mode
+        keys = quantized.view(self.__key).ravel().tolist()
+
+        # A point with a non-finite input has no key, it is never found nor stored
+        if not all_finite:
+            for row in np.flatnonzero(~finite).tolist():
+                keys[row] = None
+
+        entries = self.__entries
+        values = np.empty((len(keys), len(fields)))
+        missing = []
+
+        for row, key in enumerate(keys):
+            result = entries.get(key)
+            if result is None:
+                missing.append(row)
+            else:
+                entries.move_to_end(key)
+                values[row] = result
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            points = TireStateBatch.from_state(state)[0][np.array(missing)]
+            self.model.solve_batch(points, mode)
+
+            computed = np.empty((len(missing), len(fields)))
+            for column, name in enumerate(fields):
+                computed[:, column] = getattr(points, name)
+            values[missing] = computed
+
+            for row, result in zip(missing, computed.tolist()):
+                if keys[row] is not None:
+                    entries[keys[row]] = result
+
+            while len(entries) > self.size:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+        for column, name in enumerate(fields):
+            setattr(state, name, values[:, column].reshape(shape) if shape else float(values[0, column]))
+
+        return state
@@ -0,0 +1,142 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..Core import TireState, TireStateBatch
+from .solvermode import SolverMode
+
+# Ratio of the golden section
+_GOLDEN = (np.sqrt(5.0) - 1.0) / 2.0
+
+
+class FrictionEnvelope(object):
+    """Combined slip force envelope (friction ellipse) of a tire model for many load cases at once.
+
+    The envelope is traced along rays in the slip plane, SR = s * cos(phi) and tan(SA) = s * sin(phi), with the
+    direction phi going round the full circle. On every ray the slip s that gives the largest resultant force
+    sqrt(FX^2 + FY^2) is found: a coarse scan of samples points over (0, slip_range] brackets the peak, which a
+    golden section search then narrows down to tolerance. The peak force of each ray is one point of the envelope.
+
+    The envelope is meant to be interpolated in polar form, force against force direction. Directions start evenly
+    spaced, then the intervals next to an envelope point are split wherever the force of the point differs from the
+    one interpolated between its neighbours by more than max_error (relative to the largest force of the load case),
+    until all points are within max_error or max_directions is reached. The peak of a new direction is searched for
+    around the peak slips of its neighbours, without a coarse scan.
+
+    All load cases share the directions, so every step is one vectorized model evaluation of all cases and rays.
+    evaluations counts the model points used so far.
+    """
+
+    def __init__(self, model, directions=16, slip_range=0.5, samples=8, tolerance=2e-3, max_error=0.01,
+                 max_directions=128):
+        self.model = model
+        self.directions = directions
+        self.slip_range = slip_range
+        self.samples = samples
+        self.tolerance = tolerance
+        self.max_error = max_error
+        self.max_directions = max_directions
+        self.evaluations = 0
+
+    def solve(self, FZ, IA=0.0, V=16.6, P=0.0):
+        """Envelope of every load case, FZ, IA, V and P are scalars or arrays broadcast against each other.
+
+        Returns a TireState with (cases, directions) arrays of the envelope points FX, FY and the slip SA, SR
+        they are found at, and the load case in FZ, IA, V and P, sorted by slip direction. cases is the number of
+        elements of the broadcast load case.
+        """
+        cases = [np.asarray(value, dtype=float) for value in (FZ, IA, V, P)]
+        cases = [value.ravel()[:, np.newaxis] for value in np.broadcast_arrays(*cases)]
+
+        phi = np.linspace(0.0, 2.0 * np.pi, self.directions, endpoint=False)
+        points = self.__peaks(cases, phi)
+
+        while len(phi) < self.max_directions:
+            # Radius of every point against the radius interpolated from its neighbours at its force direction,
+            # relative to the largest force of the case. Both intervals next to a point that is off are split.
+            FX, FY = points[0], points[1]
+            radius = np.hypot(FX, FY)
+            angle = np.unwrap(np.arctan2(FY, FX), axis=1)
+            turn = 2.0 * np.pi * np.round((angle[:, -1:] - angle[:, :1]) / (2.0 * np.pi))
+            before = np.concatenate((angle[:, -1:] - turn, angle[:, :-1]), axis=1)
+            after = np.concatenate((angle[:, 1:], angle[:, :1] + turn), axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                weight = np.clip((angle - before) / (after - before), 0.0, 1.0)
+            interpolated = (1.0 - weight) * np.roll(radius, 1, axis=1) + weight * np.roll(radius, -1, axis=1)
+            error = np.max(np.abs(radius - interpolated) / np.max(radius, axis=1, keepdims=True), axis=0)
+
+            off = error > self.max_error
+            split = np.flatnonzero(off | np.roll(off, -1))[:self.max_directions - len(phi)]
+            if len(split) == 0:
+                break
+
+            # The peak slip of a new direction is searched for around the peak slips of its neighbours
+            following = np.append(phi[1:], 2.0 * np.pi)
+            new_phi = 0.5 * (phi[split] + following[split])
+            slip = np.hypot(points[3], np.tan(points[2]))
+            neighbours = (slip[:, split], slip[:, (split + 1) % len(phi)])
+            step = self.slip_range / self.samples
+            new_points = self.__peaks(cases, new_phi, np.maximum(np.minimum(*neighbours) - step, 0.0),
+                                      np.minimum(np.maximum(*neighbours) + step, self.slip_range))
+
+            order = np.argsort(np.append(phi, new_phi))
+            phi = np.append(phi, new_phi)[order]
+            points = [np.concatenate((old, new), axis=1)[:, order] for old, new in zip(points, new_points)]
+
+        result = TireState()
+        result.FX, result.FY, result.SA, result.SR = points
+        result.FZ, result.IA, result.V, result.P = [np.broadcast_to(value, points[0].shape) for value in cases]
+
+        return result
+
+    def __peaks(self, cases, phi, a=None, b=None):
+        # (FX, FY, SA, SR) of the largest resultant force on every ray phi, as (cases, rays) arrays. The peak slip is
+        # searched for between a and b, or found by a coarse scan if they aren't given.
+        shape = (len(cases[0]), len(phi))
+        direction_x = np.cos(phi)
+        direction_y = np.sin(phi)
+
+        if a is None:
+            # Coarse scan, the peak lies between the neighbours of the largest sample
+            step = self.slip_range / self.samples
+            scan = np.arange(1, self.samples + 1) * step
+            force = np.stack([self.__evaluate(cases, s * direction_x, s * direction_y, shape)[0] for s in scan])
+            best = np.argmax(force, axis=0)
+            a = best * step
+            b = np.minimum(best + 2, self.samples) * step
+
+        # Golden section search between a and b, every iteration evaluates one new interior point
+        c = b - _GOLDEN * (b - a)
+        d = a + _GOLDEN * (b - a)
+        force_c = self.__evaluate(cases, c * direction_x, c * direction_y, shape)[0]
+        force_d = self.__evaluate(cases, d * direction_x, d * direction_y, shape)[0]
+
+        for iteration in range(int(np.ceil(np.log(self.tolerance / np.max(b - a)) / np.log(_GOLDEN)))):
+            # The peak is in [a, d] if c is the larger one, else in [c, b], the interior point on that side is kept
+            left = force_c > force_d
+            a = np.where(left, a, c)
+            b = np.where(left, d, b)
+            kept = np.where(left, force_c, force_d)
+            c, d = np.where(left, b - _GOLDEN * (b - a), d), np.where(left, c, a + _GOLDEN * (b - a))
+
+            s = np.where(left, c, d)
+            force = self.__evaluate(cases, s * direction_x, s * direction_y, shape)[0]
+            force_c = np.where(left, force, kept)
+            force_d = np.where(left, kept, force)
+
+        s = 0.5 * (a + b)
+        FX, FY = self.__evaluate(cases, s * direction_x, s * direction_y, shape)[1:]
+
+        return FX, FY, np.arctan(s * direction_y), s * direction_x
+
+    def __evaluate(self, cases, SR, tan_SA, shape):
+        # Resultant force, FX and FY of every load case on every ray, as (cases, rays) arrays
+        FZ, IA, V, P = cases
+        state = TireStateBatch.from_state(TireState(FZ=FZ, IA=IA, V=V, P=P, SA=np.arctan(tan_SA), SR=SR), shape)[0]
+        self.model.solve_batch(state, SolverMode.Fx | SolverMode.Fy)
+        self.evaluations += len(state)
+
+        FX = state.FX.reshape(shape)
+        FY = state.FY.reshape(shape)
+
+        return np.hypot(FX, FY), FX, FY
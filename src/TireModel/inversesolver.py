@@ -0,0 +1,91 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..Core import TireStateBatch
+
+
+class InverseSolver(object):
+    """Vectorized inverse of the pure force equations of a tire model.
+
+    Finds the slip angle that gives a target FY, or the slip ratio that gives a target FX, for every element of a
+    batch of states at once. Each element is solved with Newton iterations on the analytic Magic Formula slope
+    (calculate_pure_fy_derivative / calculate_pure_fx_derivative). Iterates are kept inside a bracket around the
+    root, and where a Newton step would leave the bracket (e.g. near the force peak where the slope vanishes) a
+    bisection step is taken instead.
+
+    Works with PAC2002 and Pacejka94. The bracket is given in the slip units of the model and should not reach far
+    beyond the force peak, targets without a sign change of the residual over the bracket are reported as not
+    converged. PAC2002 needs a non-zero V (the slip angle is multiplied by sign(V)).
+    """
+
+    def __init__(self, model, tolerance=1e-3, max_iterations=50):
+        self.model = model
+        self.tolerance = tolerance  # Force tolerance [N]
+        self.max_iterations = max_iterations
+
+    def solve_slip_angle(self, state, target_fy, bracket=(-0.5, 0.5)):
+        """Return (SA, converged) arrays, where SA gives the pure lateral force target_fy for each state"""
+        return self.__solve(state, target_fy, 'SA', self.model.calculate_pure_fy,
+                            self.model.calculate_pure_fy_derivative, bracket)
+
+    def solve_slip_ratio(self, state, target_fx, bracket=(-0.5, 0.5)):
+        """Return (SR, converged) arrays, where SR gives the pure longitudinal force target_fx for each state"""
+        return self.__solve(state, target_fx, 'SR', self.model.calculate_pure_fx,
+                            self.model.calculate_pure_fx_derivative, bracket)
+
+    def __solve(self, state, target, variable, calculate, derivative, bracket):
+
+        # Broadcast the target and the state columns against each other into one flat working batch
+        target = np.asarray(target, dtype=float)
+        work, shape = TireStateBatch.from_state(state, target.shape)
+        target = np.broadcast_to(target, shape).ravel()
+
+        def residual(index, x, slope=True):
+            points = work[index]
+            setattr(points, variable, x)
+            return calculate(points) - target[index], derivative(points) if slope else None
+
+        everything = np.arange(len(work))
+        lo = np.full(len(work), float(bracket[0]))
+        hi = np.full(len(work), float(bracket[1]))
+        f_lo, _ = residual(everything, lo, slope=False)
+        f_hi, _ = residual(everything, hi, slope=False)
+
+        # Targets without a sign change in the bracket can't be reached, return the closest bracket end
+        bracketed = f_lo * f_hi <= 0.0
+        x = np.where(np.abs(f_lo) < np.abs(f_hi), lo, hi)
+        converged = np.zeros(len(work), dtype=bool)
+
+        # Orient every bracket so that the residual is negative at lo and positive at hi
+        lo, hi = np.where(f_lo > 0.0, hi, lo), np.where(f_lo > 0.0, lo, hi)
+
+        active = np.flatnonzero(bracketed)
+        x[active] = 0.5 * (lo[active] + hi[active])
+
+        for iteration in range(self.max_iterations):
+            if active.size == 0:
+                break
+
+            f, df = residual(active, x[active])
+            done = np.abs(f) <= self.tolerance
+            converged[active[done]] = True
+
+            # Shrink the bracket around the root
+            below = f < 0.0
+            lo[active] = np.where(below, x[active], lo[active])
+            hi[active] = np.where(below, hi[active], x[active])
+
+            # Newton step, replaced by bisection where it doesn't land strictly inside the bracket
+            with np.errstate(divide='ignore', invalid='ignore'):
+                newton = x[active] - f / df
+            inside = (newton - lo[active]) * (newton - hi[active]) < 0.0
+            step = np.where(inside, newton, 0.5 * (lo[active] + hi[active]))
+            x[active] = np.where(done, x[active], step)
+
+            # Stop on convergence, or when the bracket has collapsed without reaching the tolerance
+            # (a discontinuity, e.g. the sign dependent curvature factor E at zero slip)
+            collapsed = np.abs(hi[active] - lo[active]) <= 1e-14 * (1.0 + np.abs(x[active]))
+            active = active[~(done | collapsed)]
+
+        return x.reshape(shape), converged.reshape(shape)
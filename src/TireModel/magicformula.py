@@ -0,0 +1,15 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+
+def magic_formula_slope(B, C, D, E, x):
+    """Derivative of the Magic Formula y = D * sin(C * atan(B*x - E*(B*x - atan(B*x)))) with respect to x.
+
+    B, C, D and E are treated as constants. Works on scalars and arrays.
+    """
+    Bx = B * x
+    u = Bx - E * (Bx - np.arctan(Bx))
+    du_dx = B * (1.0 - E + E / (1.0 + Bx * Bx))
+
+    return D * np.cos(C * np.arctan(u)) * C * du_dx / (1.0 + u * u)
@@ -0,0 +1,78 @@
+__author__ = 'henningo'
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ..Core import TireStateBatch, SweepGrid
+from ..Core.sweepgrid import DEFAULT_CHUNK_SIZE
+from .solvermode import SolverMode
+
+# Model used by the functions below, set once per worker process by the pool initializer
+_worker_model = None
+
+
+def _initialize_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _solve_chunk(grid, start, stop, mode):
+    state = _worker_model.solve_batch(grid.expand(start, stop), mode)
+    return state.data
+
+
+class ParallelSweep(object):
+    """Evaluates the operating point grid of a sweep on a pool of worker processes.
+
+    The model (and with it all coefficients) is sent to each worker once, when the pool is started. Tasks only
+    carry the grid axes and a chunk index range, and results are reassembled in grid order, so the output is
+    identical to model.solve_batch on the full grid whatever the number of workers.
+
+    Coefficient changes made on the model after the pool has started are not seen by the workers, call close()
+    (or use a new ParallelSweep) to pick them up.
+    """
+
+    def __init__(self, model, processes=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.model = model
+        self.processes = processes if processes is not None else os.cpu_count()
+        self.chunk_size = chunk_size
+        self.__executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+    def __get_executor(self):
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_initialize_worker,
+                                                  initargs=(self.model,))
+        return self.__executor
+
+    def solve_chunks(self, input_state, mode=SolverMode.All):
+        """Yield (start, stop, TireStateBatch) for every chunk of the grid, in grid order"""
+        grid = SweepGrid.from_state(input_state, self.model.GRID_AXES)
+        bounds = list(grid.chunk_bounds(self.chunk_size))
+
+        # Executor.map returns results in submission order, regardless of which worker finishes first
+        results = self.__get_executor().map(_solve_chunk, [grid] * len(bounds), [start for start, stop in bounds],
+                                            [stop for start, stop in bounds], [mode] * len(bounds))
+
+        for (start, stop), data in zip(bounds, results):
+            yield start, stop, TireStateBatch(data=data)
+
+    def solve(self, input_state, mode=SolverMode.All):
+        """Solve the full grid described by input_state and return it as a single TireStateBatch"""
+        grid = SweepGrid.from_state(input_state, self.model.GRID_AXES)
+        states = TireStateBatch(len(grid))
+
+        for start, stop, state in self.solve_chunks(input_state, mode):
+            states.data[:, start:stop] = state.data
+
+        return states
@@ -1,15 +1,69 @@
 __author__ = 'henningo'
 
+from enum import IntFlag
 
-class SolverMode():
-    All = 0
+
+class SolverMode(IntFlag):
+    # Modes are bit flags and can be combined, e.g. SolverMode.Fy | SolverMode.Mz
     Fy = 1
     Fx = 2
-    Mz = 3
-    Mx = 4
-    Radius = 5
-    Relaxation = 6
-    PureFy = 7
-    PureFx = 8
-    PureMx = 9
-    PureMz = 10
+    Mz = 4
+    Mx = 8
+    My = 16
+    Radius = 32
+    Relaxation = 64
+    PureFy = 128
+    PureFx = 256
+    PureMx = 512
+    PureMz = 1024
+    All = Fy | Fx | Mz | Mx | My | Radius | Relaxation
+
+    def schedule(self):
+        """Return the single outputs needed for this mode, including their dependencies, in evaluation order"""
+        required = self
+        for output in reversed(_EVALUATION_ORDER):
+            if required & output:
+                required |= _DEPENDENCIES.get(output, 0)
+
+        return [output for output in _EVALUATION_ORDER if required & output]
+
+    def fields(self):
+        """Return the names of the TireState fields written for this mode (not counting its dependencies)"""
+        try:
+            return _FIELDS[self]
+        except KeyError:
+            fields = tuple(field for output, names in _OUTPUT_FIELDS if self & output for field in names)
+            _FIELDS[self] = fields
+            return fields
+
+
+# Outputs that use other outputs of the same state (e.g. Mz uses FY and FX)
+_DEPENDENCIES = {
+    SolverMode.Mz: SolverMode.Fy | SolverMode.Fx,
+    SolverMode.Mx: SolverMode.Fy,
+    SolverMode.My: SolverMode.Fx,
+    SolverMode.Radius: SolverMode.Fy | SolverMode.Fx,
+    SolverMode.PureMz: SolverMode.PureFy,
+    SolverMode.PureMx: SolverMode.PureFy,
+}
+
+# Every output comes after its dependencies. Pure forces come before combined ones, so if both are requested the
+# combined force is the one left in FY/FX. The pure moments use the pure lateral force of the evaluation context,
+# not FY, so they are the same whichever combined outputs are requested with them.
+_EVALUATION_ORDER = (SolverMode.PureFy, SolverMode.Fy, SolverMode.PureFx, SolverMode.Fx, SolverMode.PureMz,
+                     SolverMode.Mz, SolverMode.PureMx, SolverMode.Mx, SolverMode.My, SolverMode.Radius,
+                     SolverMode.Relaxation)
+
+# TireState fields written by each output
+_OUTPUT_FIELDS = (
+    (SolverMode.Fy | SolverMode.PureFy, ('FY',)),
+    (SolverMode.Fx | SolverMode.PureFx, ('FX',)),
+    (SolverMode.Mz | SolverMode.PureMz, ('MZ',)),
+    (SolverMode.Mx | SolverMode.PureMx, ('MX',)),
+    (SolverMode.My, ('MY',)),
+    (SolverMode.Radius, ('RL', 'RE')),
+    (SolverMode.Relaxation, ('SIGMA_ALPHA', 'SIGMA_KAPPA')),
+)
+
+# Fields of every mode value seen so far, modes are combined freely but only a few combinations are used
+_FIELDS = dict()
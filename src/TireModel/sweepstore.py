@@ -0,0 +1,258 @@
+__author__ = 'henningo'
+
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from ..Core import TireStateBatch, SweepGrid
+from ..Core.sweepgrid import DEFAULT_CHUNK_SIZE
+from .solvermode import SolverMode
+
+# Layout version of the store directory, a store written with another version isn't resumed
+STORE_VERSION = 1
+
+
+def _write_parquet(fname, columns, compression, row_group_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_arrays([pa.array(values) for values in columns.values()], names=list(columns))
+    pq.write_table(table, fname, compression=compression or 'zstd', row_group_size=row_group_size)
+
+
+def _read_parquet(fname, fields, rows, row_group_size):
+    import pyarrow.parquet as pq
+
+    # Only the row groups holding the rows are read. All row groups but the last one of a file are full, so the
+    # position of a row in the groups read follows from the number of groups read before its own.
+    group = rows // row_group_size
+    groups = np.unique(group)
+    table = pq.ParquetFile(fname).read_row_groups(groups.tolist(), columns=list(fields))
+    rows = np.searchsorted(groups, group) * row_group_size + rows - group * row_group_size
+
+    return dict((name, table.column(name).to_numpy()[rows]) for name in fields)
+
+
+def _write_hdf5(fname, columns, compression, row_group_size):
+    import h5py
+
+    with h5py.File(fname, 'w') as f:
+        for name, values in columns.items():
+            f.create_dataset(name, data=values, chunks=(min(row_group_size, len(values)),),
+                             compression=compression or 'gzip')
+
+
+def _read_hdf5(fname, fields, rows, row_group_size):
+    import h5py
+
+    # Reading the range of the rows only decompresses the HDF5 chunks (row groups) it covers
+    with h5py.File(fname, 'r') as f:
+        return dict((name, f[name][rows[0]:rows[-1] + 1][rows - rows[0]]) for name in fields)
+
+
+def _write_npz(fname, columns, compression, row_group_size):
+    with open(fname, 'wb') as f:
+        np.savez_compressed(f, **columns)
+
+
+def _read_npz(fname, fields, rows, row_group_size):
+    # Every column is a member of the archive, only the fields asked for are decompressed
+    with np.load(fname) as archive:
+        return dict((name, archive[name][rows]) for name in fields)
+
+
+# Writer and reader of every file format
+FILE_FORMATS = {
+    'parquet': ('.parquet', _write_parquet, _read_parquet),
+    'hdf5': ('.h5', _write_hdf5, _read_hdf5),
+    'npz': ('.npz', _write_npz, _read_npz),
+}
+
+
+class SweepStore(object):
+    """Sweep results on disk, written chunk by chunk so that an interrupted sweep can be resumed.
+
+    run solves the grid of a model (as model.solve, slip angle varying fastest) in chunks of chunk_size points,
+    and writes every chunk to its own compressed columnar file: npz (NumPy only, the default), Parquet (needs
+    pyarrow) or HDF5 (needs h5py). Inside Parquet and HDF5 files the points are split into row groups (HDF5 chunks) of row_group_size
+    points, an npz file is read a whole column at a time. A file is written under a temporary name and renamed,
+    then its chunk is recorded as complete in manifest.json, so a chunk is either complete or solved again.
+
+    Running the same sweep again (same grid, mode, chunk size and model coefficients) only solves the chunks that
+    are missing, another sweep in the same directory raises ValueError until the store is cleared.
+
+    read returns the points of a slice of the grid, e.g. read(FZ=4000.0, IA=0.0). The rows of the slice follow from
+    the grid, so only the files and row groups holding them are read.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, directory, file_format='npz', compression=None, row_group_size=DEFAULT_CHUNK_SIZE // 4):
+        if file_format not in FILE_FORMATS:
+            raise ValueError('Unknown file format ' + repr(file_format))
+
+        self.directory = directory
+        self.file_format = file_format
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        try:
+            with open(os.path.join(directory, self.MANIFEST)) as f:
+                self.__manifest = json.load(f)
+        except (IOError, ValueError):
+            self.__manifest = None
+
+        if self.__manifest is not None and self.__manifest.get('version') != STORE_VERSION:
+            self.__manifest = None
+
+    @property
+    def complete(self):
+        """True if every chunk of the stored sweep has been written"""
+        return self.__manifest is not None and len(self.__manifest['complete']) == self.__manifest['chunks']
+
+    def run(self, model, input_state, mode=SolverMode.All, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Solve the chunks of the grid described by input_state that aren't stored yet.
+
+        Returns the number of chunks solved by this call.
+        """
+        grid = SweepGrid.from_state(input_state, model.GRID_AXES)
+        mode = SolverMode(mode)
+        manifest = self.__describe(model, grid, mode, chunk_size)
+
+        if self.__manifest is None:
+            self.__manifest = manifest
+            self.__save()
+        elif dict(self.__manifest, complete=[]) != manifest:
+            raise ValueError(self.directory + ' holds another sweep, clear it or use another directory')
+
+        write = FILE_FORMATS[self.__manifest['format']][1]
+        complete = set(self.__manifest['complete'])
+        solved = 0
+
+        for index, (start, stop) in enumerate(grid.chunk_bounds(chunk_size)):
+            if index in complete:
+                continue
+
+            state = model.solve_batch(grid.expand(start, stop), mode)
+            columns = dict((name, np.ascontiguousarray(getattr(state, name))) for name in manifest['fields'])
+            self.__replace(self.__chunk_file(index), lambda fname: write(fname, columns, self.compression,
+                                                                          self.__manifest['row_group_size']))
+
+            self.__manifest['complete'].append(index)
+            self.__save()
+            solved += 1
+
+        return solved
+
+    def read(self, fields=None, **selection):
+        """Points of the stored sweep where every axis named in selection has the given value (or one of a list of
+        values), as a TireStateBatch in grid order. Only fields (all stored fields by default) are read, other
+        fields are zero. Raises ValueError for a value that isn't on its axis or a chunk that isn't stored yet."""
+        if self.__manifest is None:
+            raise ValueError(self.directory + ' holds no sweep')
+
+        manifest = self.__manifest
+        names = manifest['names']
+        fields = manifest['fields'] if fields is None else list(fields)
+
+        # Flat rows of the slice, from the grid index of every selected axis value
+        indices = []
+        for name, axis in zip(names, manifest['axes']):
+            axis = np.asarray(axis)
+            if name not in selection:
+                indices.append(np.arange(len(axis)))
+                continue
+
+            found = [np.flatnonzero(np.isclose(axis, value)) for value in np.atleast_1d(selection[name])]
+            if any(len(index) == 0 for index in found):
+                raise ValueError(repr(selection[name]) + ' is not on the ' + name + ' axis')
+            indices.append(np.unique(np.concatenate(found)))
+
+        shape = [len(axis) for axis in manifest['axes']]
+        rows = np.ravel_multi_index(np.meshgrid(*indices, indexing='ij'), shape).ravel()
+        rows.sort()
+
+        read = FILE_FORMATS[manifest['format']][2]
+        chunk_size = manifest['chunk_size']
+        chunks = rows // chunk_size
+        complete = set(manifest['complete'])
+
+        batch = TireStateBatch(len(rows))
+        for chunk in np.unique(chunks):
+            if chunk not in complete:
+                raise ValueError('Chunk ' + str(chunk) + ' of ' + self.directory + ' is not stored yet')
+
+            selected = np.flatnonzero(chunks == chunk)
+            values = read(self.__chunk_file(chunk), fields, rows[selected] - chunk * chunk_size,
+                          manifest['row_group_size'])
+            for name in fields:
+                getattr(batch, name)[selected] = values[name]
+
+        return batch
+
+    def clear(self):
+        """Remove the stored sweep, and the temporary files of an interrupted write"""
+        if self.__manifest is not None:
+            for index in self.__manifest['complete']:
+                os.remove(self.__chunk_file(index))
+
+        for fname in glob.glob(os.path.join(self.directory, '*.tmp')):
+            os.remove(fname)
+
+        fname = os.path.join(self.directory, self.MANIFEST)
+        if os.path.exists(fname):
+            os.remove(fname)
+
+        self.__manifest = None
+
+    def __describe(self, model, grid, mode, chunk_size):
+        # Manifest of a sweep without any complete chunk, two runs with equal manifests solve the same points
+        get_parameter_vector = getattr(model, 'get_parameter_vector', None)
+        coefficients = None
+        if get_parameter_vector is not None:
+            coefficients = hashlib.sha1(np.asarray(get_parameter_vector(), dtype=float).tobytes()).hexdigest()
+
+        fields = list(grid.names) + [name for name in mode.fields() if name not in grid.names]
+
+        return {'version': STORE_VERSION,
+                'format': self.file_format,
+                'model': getattr(model, 'Name', type(model).__name__),
+                'coefficients': coefficients,
+                'mode': int(mode),
+                'names': list(grid.names),
+                'axes': [axis.tolist() for axis in grid.axes],
+                'fields': fields,
+                'chunk_size': chunk_size,
+                'chunks': -(-grid.size // chunk_size),
+                'row_group_size': self.row_group_size,
+                'complete': []}
+
+    def __chunk_file(self, index):
+        return os.path.join(self.directory, 'chunk{0:06d}'.format(index) + FILE_FORMATS[self.__manifest['format']][0])
+
+    def __save(self):
+        self.__replace(os.path.join(self.directory, self.MANIFEST),
+                       lambda fname: self.__write_text(fname, json.dumps(self.__manifest)))
+
+    def __write_text(self, fname, text):
+        with open(fname, 'w') as f:
+            f.write(text)
+
+    def __replace(self, fname, write):
+        # Write into a temporary file next to fname and rename it, so an interrupted write never leaves a partial
+        # file behind
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(handle)
+        try:
+            write(temporary)
+            os.replace(temporary, fname)
+        except BaseException:
+            os.remove(temporary)
+            raise
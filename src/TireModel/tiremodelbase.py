@@ -1,6 +1,8 @@
 __author__ = 'henningo'
 import abc
 
+from .solvermode import SolverMode
+
 class TireModelBase(object, metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
@@ -19,10 +21,15 @@ class TireModelBase(object, metaclass=abc.ABCMeta):
         return
 
     @abc.abstractmethod
-    def solve(self, state, mode=0):
+    def solve(self, state, mode=SolverMode.All):
         """Calculate steady state force"""
         return
 
+    @abc.abstractmethod
+    def solve_batch(self, state, mode=SolverMode.All):
+        """Calculate steady state force for a state or TireStateBatch, writing the outputs in place"""
+        return
+
     @abc.abstractmethod
     def get_parameters(self):
         """Return the parameters dictionary"""
@@ -0,0 +1,108 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..Core import TireState, TireStateBatch
+from .solvermode import SolverMode
+
+
+class TransientSimulation(object):
+    """Fixed step time-domain simulation of the tire forces with first order relaxation of the slip.
+
+    The slip angle and slip ratio the tire sees lag behind the kinematic (steady state) slip, as a first order
+    system over the relaxation lengths of the model, sigma * d(alpha)/dt + |V| * alpha = |V| * SA and the same for
+    the slip ratio. The kinematic slip ratio follows from the wheel speed, (OMEGA * RE - V) / |V|, with the
+    effective rolling radius RE of the model. Every step the model is evaluated at the lagging slip, which gives the
+    forces as well as the relaxation lengths and radius used for the next step.
+
+    The lag is integrated exactly over a step, alpha += (SA - alpha) * (1 - exp(-|V| * dt / sigma)), so the update is
+    stable for any step size and relaxation length. A zero relaxation length gives the steady state response.
+
+    All tires are simulated together, the model is evaluated once per step for all of them. The model has to compute
+    the Radius and Relaxation outputs (e.g. PAC2002), they are always requested in addition to mode. Below
+    min_speed the slip ratio is computed with min_speed instead of |V|.
+    """
+
+    def __init__(self, model, dt=0.001, mode=SolverMode.All, min_speed=0.5):
+        self.model = model
+        self.dt = dt
+        self.mode = SolverMode(mode)
+        self.min_speed = min_speed
+
+    def steps(self, V, SA, OMEGA, FZ, IA=0.0, P=0.0, alpha=None, kappa=None):
+        """Yield (step, TireStateBatch) for every time step of the inputs.
+
+        Inputs are scalars, (steps,) time series shared by all tires, (1, tires) constants per tire or (steps, tires)
+        arrays. V is the forward speed, SA the kinematic slip angle and OMEGA the wheel speed. The initial lagging
+        slip angle and slip ratio (alpha and kappa) default to the kinematic slip of the first step. The batch holds
+        the lagging slip in SA and SR and the outputs at that step, it is reused for the next step, copy what you
+        want to keep.
+        """
+        V, SA, OMEGA, FZ, IA, P = self.__inputs(V, SA, OMEGA, FZ, IA, P)
+        steps, tires = V.shape
+
+        mode = self.mode | SolverMode.Radius | SolverMode.Relaxation
+        state = TireStateBatch(tires)
+
+        # Effective rolling radius of the first step, from the model at the kinematic slip angle without slip ratio
+        state.V, state.FZ, state.IA, state.P, state.SA = V[0], FZ[0], IA[0], P[0], SA[0]
+        self.model.solve_batch(state, mode)
+        radius = state.RE.copy()
+
+        alpha = SA[0].copy() if alpha is None else np.broadcast_to(np.asarray(alpha, dtype=float), (tires,)).copy()
+        kappa = (self.__kinematic_slip_ratio(V[0], OMEGA[0], radius) if kappa is None else
+                 np.broadcast_to(np.asarray(kappa, dtype=float), (tires,)).copy())
+
+        for step in range(steps):
+            speed = np.abs(V[step])
+
+            state.V, state.FZ, state.IA, state.P = V[step], FZ[step], IA[step], P[step]
+            state.SA = alpha
+            state.SR = kappa
+            self.model.solve_batch(state, mode)
+
+            yield step, state
+
+            # Exact solution of the first order lag over one step, towards the kinematic slip of this step
+            alpha += (SA[step] - alpha) * self.__response(speed, state.SIGMA_ALPHA)
+            kappa += (self.__kinematic_slip_ratio(V[step], OMEGA[step], state.RE) - kappa) * \
+                self.__response(speed, state.SIGMA_KAPPA)
+
+    def run(self, V, SA, OMEGA, FZ, IA=0.0, P=0.0, alpha=None, kappa=None):
+        """Simulate all steps, see steps.
+
+        Returns a TireState with (steps, tires) arrays of the lagging slip SA and SR, the inputs V, FZ, IA and P,
+        and the outputs of mode. Other fields are zero.
+        """
+        inputs = self.__inputs(V, SA, OMEGA, FZ, IA, P)
+        fields = ('SA', 'SR', 'V', 'FZ', 'IA', 'P') + self.mode.fields()
+
+        result = TireState()
+        for name in fields:
+            setattr(result, name, np.empty(inputs[0].shape))
+
+        for step, state in self.steps(*inputs, alpha=alpha, kappa=kappa):
+            for name in fields:
+                getattr(result, name)[step] = getattr(state, name)
+
+        return result
+
+    def __inputs(self, *inputs):
+        # Inputs broadcast to (steps, tires), a 1-D input is a time series
+        inputs = [np.asarray(value, dtype=float) for value in inputs]
+        inputs = [value[:, np.newaxis] if value.ndim == 1 else value for value in inputs]
+        shape = np.broadcast_shapes(*[value.shape for value in inputs])
+        shape = (1,) * (2 - len(shape)) + shape
+
+        return [np.broadcast_to(value, shape) for value in inputs]
+
+    def __kinematic_slip_ratio(self, V, OMEGA, radius):
+        return (OMEGA * radius - V) / np.maximum(np.abs(V), self.min_speed)
+
+    def __response(self, speed, sigma):
+        # 1 - exp(-distance / sigma), the part of the step towards the kinematic slip covered in one time step.
+        # A zero relaxation length covers all of it.
+        with np.errstate(divide='ignore', invalid='ignore'):
+            response = -np.expm1(-speed * self.dt / sigma)
+
+        return np.where(sigma > 0.0, response, 1.0)
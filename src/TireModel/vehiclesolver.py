@@ -0,0 +1,145 @@
+__author__ = 'henningo'
+
+import numpy as np
+
+from ..Core import TireState, TireStateBatch
+from .solvermode import SolverMode
+
+# Order of the wheels along the last axis of a vehicle state
+WHEELS = ('FL', 'FR', 'RL', 'RR')
+
+
+class QuasiStaticVehicle(object):
+    """Rigid vehicle with quasi-static load transfer, giving the wheel loads for a set of tire forces.
+
+    The accelerations follow from the sum of the tire forces, ax = sum(FX) / mass and ay = sum(FY) / mass, in
+    vehicle axes with x forward and y to the left (the wheel forces are used as they are, steer angles are not
+    accounted for). Longitudinal load transfer mass * ax * cg_height / wheelbase moves load from the front to the rear
+    axle, lateral load transfer moves load to the right wheels, split between the axles by roll_stiffness_front.
+
+    Every parameter is a scalar or a (vehicles,) array, e.g. for a Monte-Carlo set of vehicles.
+    """
+
+    def __init__(self, mass, wheelbase, cg_to_front, cg_height, track_front, track_rear, roll_stiffness_front=0.5,
+                 gravity=9.81):
+        self.mass = mass
+        self.wheelbase = wheelbase
+        self.cg_to_front = cg_to_front
+        self.cg_height = cg_height
+        self.track_front = track_front
+        self.track_rear = track_rear
+        self.roll_stiffness_front = roll_stiffness_front
+        self.gravity = gravity
+
+    def static_loads(self, index=slice(None)):
+        """(vehicles, 4) wheel loads at rest, for the vehicles selected by index"""
+        return self.wheel_loads(0.0, 0.0, index)
+
+    def wheel_loads(self, FX, FY, index=slice(None)):
+        """(vehicles, 4) wheel loads for (vehicles, 4) tire forces FX and FY, for the vehicles selected by index"""
+        mass, wheelbase, a, height, track_front, track_rear, front_share, gravity = [
+            np.asarray(value, dtype=float)[index][..., np.newaxis] if np.ndim(value) else value
+            for value in (self.mass, self.wheelbase, self.cg_to_front, self.cg_height, self.track_front,
+                          self.track_rear, self.roll_stiffness_front, self.gravity)]
+
+        # Total force on the vehicle times the height of the centre of gravity, per axle and side
+        longitudinal = np.sum(FX, axis=-1, keepdims=True) * height / wheelbase
+        lateral = np.sum(FY, axis=-1, keepdims=True) * height
+
+        front = 0.5 * (mass * gravity * (wheelbase - a) / wheelbase - longitudinal)
+        rear = 0.5 * (mass * gravity * a / wheelbase + longitudinal)
+        front_transfer = lateral * front_share / track_front
+        rear_transfer = lateral * (1.0 - front_share) / track_rear
+
+        return np.concatenate(np.broadcast_arrays(front - front_transfer, front + front_transfer,
+                                                  rear - rear_transfer, rear + rear_transfer), axis=-1)
+
+
+class VehicleSolver(object):
+    """Evaluates all wheels of many vehicles in one vectorized call, optionally coupled through load transfer.
+
+    States have the shape (vehicles, 4), with the wheels ordered as WHEELS. coefficients gives every wheel its own
+    PAC2002 coefficient set: a (4, coefficients) array shared by all vehicles, or a (vehicles, 4, coefficients)
+    array. Without it all wheels use the coefficients of the model, which can then be any tire model.
+
+    solve_load_transfer finds the wheel loads that are consistent with the tire forces by fixed point iteration:
+    the tire forces at the current loads give new loads through the vehicle (e.g. a QuasiStaticVehicle), until the
+    loads of a vehicle change by less than tolerance [N]. Each vehicle is checked on its own, converged vehicles are
+    no longer evaluated. relaxation below 1 damps the update, for vehicles close to the grip limit.
+    """
+
+    def __init__(self, model, coefficients=None, tolerance=1.0, max_iterations=50, relaxation=1.0):
+        self.model = model
+        self.coefficients = None if coefficients is None else np.asarray(coefficients, dtype=float)
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.relaxation = relaxation
+
+        # Wheel sets shared by all vehicles are compiled once
+        self.__compiled = None
+        if self.coefficients is not None and self.coefficients.ndim == 2:
+            self.__compiled = model.compile_coefficient_sets(self.coefficients, tire_axis=False)
+
+    def solve_batch(self, state, mode=SolverMode.All):
+        """Evaluate every wheel of state (a TireState of (vehicles, 4) arrays) at its given load.
+
+        Returns a TireState with (vehicles, 4) arrays of the inputs and the outputs of mode.
+        """
+        columns = self.__columns(state)
+        return self.__evaluate(columns, np.arange(len(columns['FZ'])), mode)
+
+    def solve_load_transfer(self, state, vehicle, mode=SolverMode.All):
+        """Solve every wheel of state with the wheel loads of vehicle, starting from its static loads.
+
+        The FZ of state isn't used. Returns the result (as solve_batch, with the final loads in FZ) and a (vehicles,)
+        array telling which vehicles converged.
+        """
+        columns = self.__columns(state)
+        vehicles = len(columns['FZ'])
+        mode = SolverMode(mode) | SolverMode.Fx | SolverMode.Fy
+
+        columns['FZ'] = vehicle.static_loads() * np.ones((vehicles, len(WHEELS)))
+        result = TireState(**dict((name, np.zeros((vehicles, len(WHEELS)))) for name in TireStateBatch.FIELDS))
+        converged = np.zeros(vehicles, dtype=bool)
+        active = np.arange(vehicles)
+
+        for iteration in range(self.max_iterations):
+            solved = self.__evaluate(columns, active, mode)
+            for name in TireStateBatch.FIELDS:
+                getattr(result, name)[active] = getattr(solved, name)
+
+            residual = vehicle.wheel_loads(solved.FX, solved.FY, active) - solved.FZ
+            columns['FZ'][active] = solved.FZ + self.relaxation * residual
+
+            # A vehicle has converged once the loads from its tire forces are within the tolerance of the loads the
+            # forces were computed at, which are the ones kept in the result
+            done = np.max(np.abs(residual), axis=-1) < self.tolerance
+            converged[active[done]] = True
+            active = active[~done]
+
+            if len(active) == 0:
+                break
+
+        return result, converged
+
+    def __columns(self, state):
+        # Every field of state as a writable (vehicles, 4) array
+        shape = np.broadcast_shapes((len(WHEELS),),
+                                    *[np.shape(getattr(state, name)) for name in TireStateBatch.FIELDS])
+        shape = (1,) * (2 - len(shape)) + shape
+
+        return dict((name, np.array(np.broadcast_to(getattr(state, name), shape), dtype=float))
+                    for name in TireStateBatch.FIELDS)
+
+    def __evaluate(self, columns, index, mode):
+        # Solve the vehicles selected by index in one call
+        point = TireState(**dict((name, column[index]) for name, column in columns.items()))
+
+        if self.coefficients is None:
+            return self.model.solve_batch(point, mode)
+
+        compiled = self.__compiled
+        if compiled is None:
+            compiled = self.model.compile_coefficient_sets(self.coefficients[index], tire_axis=False)
+
+        return self.model.solve_batch(point, mode, self.model.create_context(point, compiled))